@@ -2,6 +2,7 @@
 代理管理API路由 - 提供代理池和代理IP的管理接口
 """
 
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
 from typing import List, Dict, Any, Optional, Union
 from pydantic import BaseModel, Field, validator
@@ -16,12 +17,11 @@ from smart_spider.core.proxy_manager import (
     ProxyPool,
     ProxyLease
 )
-from smart_spider.utils.logger import get_logger
 from smart_spider.settings import settings
 
 router = APIRouter(prefix="/proxies", tags=["代理管理"])
 proxy_manager = ProxyManager()
-logger = get_logger(__name__)
+logger = logging.getLogger(__name__)
 
 
 # Pydantic模型定义
@@ -553,7 +553,7 @@ async def get_proxy(pool_id: str, proxy_id: str):
             )
         
         # 查找代理
-        proxy_item = next((p for p in proxy_pool.proxies if p.id == proxy_id), None)
+        proxy_item = proxy_pool.proxies_by_id.get(proxy_id)
         
         if not proxy_item:
             raise HTTPException(
@@ -1202,7 +1202,7 @@ async def check_proxy_health(pool_id: str, proxy_id: str):
             )
         
         # 查找代理
-        proxy_item = next((p for p in proxy_pool.proxies if p.id == proxy_id), None)
+        proxy_item = proxy_pool.proxies_by_id.get(proxy_id)
         
         if not proxy_item:
             raise HTTPException(
@@ -1214,7 +1214,7 @@ async def check_proxy_health(pool_id: str, proxy_id: str):
         await proxy_manager._check_proxy_health(proxy_item, proxy_pool)
         
         # 重新获取代理信息
-        updated_proxy = next((p for p in proxy_pool.proxies if p.id == proxy_id), None)
+        updated_proxy = proxy_pool.proxies_by_id.get(proxy_id)
         
         if not updated_proxy:
             raise HTTPException(
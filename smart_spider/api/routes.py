@@ -2,6 +2,7 @@
 SmartSpider 的 API 路由
 """
 
+import logging
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
 from pydantic import BaseModel, HttpUrl, Field, UUID4
 from typing import List, Dict, Any, Optional, Union
@@ -9,10 +10,9 @@ import uuid
 from datetime import datetime
 from smart_spider.core.service import CrawlerService
 from smart_spider.settings import settings
-from smart_spider.utils.logger import get_logger
 
 # 初始化日志记录器
-logger = get_logger(__name__)
+logger = logging.getLogger(__name__)
 
 # 创建API路由器
 router = APIRouter()
@@ -2,6 +2,7 @@
 缓存模块 - 提供不同的缓存后端支持
 """
 
+import logging
 import os
 import json
 import asyncio
@@ -11,7 +12,6 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional, Union, Callable
 import aiofiles
 
-from smart_spider.utils.logger import get_logger
 
 
 class CacheBackend(ABC):
@@ -70,7 +70,7 @@ class MemoryCacheBackend(CacheBackend):
         self.max_size = config.get('max_size', 1000)
         self.default_ttl = config.get('default_ttl', 3600)  # 默认1小时
         self._cache: Dict[str, Dict[str, Any]] = {}
-        self.logger = get_logger(__name__)
+        self.logger = logging.getLogger(__name__)
         self.logger.info(f"初始化内存缓存: 最大大小={self.max_size}, 默认TTL={self.default_ttl}秒")
     
     async def get(self, key: str, default: Any = None) -> Any:
@@ -92,7 +92,7 @@ class MemoryCacheBackend(CacheBackend):
             await self.delete(key)
             return default
         
-        self.logger.debug(f"从缓存获取: {key}")
+        self.logger.debug("从缓存获取: %s", key)
         return cache_item['value']
     
     async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
@@ -128,7 +128,7 @@ class MemoryCacheBackend(CacheBackend):
                 'expire_at': expire_at
             }
             
-            self.logger.debug(f"设置缓存: {key}, TTL={ttl}秒")
+            self.logger.debug("设置缓存: %s, TTL=%s秒", key, ttl)
             return True
         except Exception as e:
             self.logger.error(f"设置缓存失败: {str(e)}")
@@ -143,7 +143,7 @@ class MemoryCacheBackend(CacheBackend):
         """
         if key in self._cache:
             del self._cache[key]
-            self.logger.debug(f"删除缓存: {key}")
+            self.logger.debug("删除缓存: %s", key)
             return True
         self.logger.warning(f"缓存项不存在: {key}")
         return False
@@ -220,10 +220,10 @@ class MemoryCacheBackend(CacheBackend):
         for key in expired_keys:
             if key in self._cache:  # 再次检查，以防在收集过程中被其他操作删除
                 del self._cache[key]
-                self.logger.debug(f"删除过期缓存: {key}")
+                self.logger.debug("删除过期缓存: %s", key)
         
         if expired_keys:
-            self.logger.debug(f"清理了 {len(expired_keys)} 个过期缓存项")
+            self.logger.debug("清理了 %s 个过期缓存项", len(expired_keys))
         
         return len(expired_keys)
 
@@ -239,7 +239,7 @@ class FileCacheBackend(CacheBackend):
         self.path = config.get('path', '.cache')
         self.default_ttl = config.get('default_ttl', 3600)  # 默认1小时
         self.serializer = config.get('serializer', 'pickle')  # pickle 或 json
-        self.logger = get_logger(__name__)
+        self.logger = logging.getLogger(__name__)
         
         # 确保缓存目录存在
         os.makedirs(self.path, exist_ok=True)
@@ -278,7 +278,7 @@ class FileCacheBackend(CacheBackend):
                     await self.delete(key)
                     return default
             
-            self.logger.debug(f"从文件缓存获取: {key}")
+            self.logger.debug("从文件缓存获取: %s", key)
             return cache_item['value']
         except Exception as e:
             self.logger.error(f"读取文件缓存失败: {str(e)}")
@@ -330,7 +330,7 @@ class FileCacheBackend(CacheBackend):
                 async with aiofiles.open(filepath, 'wb') as f:
                     await f.write(pickle.dumps(cache_item))
             
-            self.logger.debug(f"设置文件缓存: {key}, TTL={ttl}秒")
+            self.logger.debug("设置文件缓存: %s, TTL=%s秒", key, ttl)
             return True
         except Exception as e:
             self.logger.error(f"设置文件缓存失败: {str(e)}")
@@ -351,7 +351,7 @@ class FileCacheBackend(CacheBackend):
         
         try:
             os.remove(filepath)
-            self.logger.debug(f"删除文件缓存: {key}")
+            self.logger.debug("删除文件缓存: %s", key)
             return True
         except Exception as e:
             self.logger.error(f"删除文件缓存失败: {str(e)}")
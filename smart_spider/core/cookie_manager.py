@@ -2,6 +2,7 @@
 Cookie管理器 - 负责Cookie池管理、Cookie租用、健康检查和更新
 """
 
+import logging
 import os
 import asyncio
 import random
@@ -17,7 +18,6 @@ from smart_spider.models.cookie import (
 from smart_spider.core.crawler import SmartCrawler
 from smart_spider.core.storage import StorageManager
 from smart_spider.core.cache import get_cache
-from smart_spider.utils.logger import get_logger
 from smart_spider.settings import settings
 
 
@@ -38,7 +38,7 @@ class CookieManager:
         self.cookie_pools: Dict[str, CookiePool] = {}
         self.cookie_leases: Dict[str, CookieLease] = {}
         self.pool_lock = asyncio.Lock()
-        self.logger = get_logger(__name__)
+        self.logger = logging.getLogger(__name__)
         self.storage = StorageManager.create_storage(settings.get('storage', {}))
         self.cache = get_cache('cookie_cache', {'type': 'memory', 'max_size': 1000, 'default_ttl': 600})
         self.health_check_intervals = {
@@ -211,7 +211,7 @@ class CookieManager:
             try:
                 # 检查是否有正在使用的Cookie
                 for lease in self.cookie_leases.values():
-                    if lease.cookie_pool_id == pool_id and lease.status == LeaseStatus.ACTIVE:
+                    if lease.pool_id == pool_id and lease.status == LeaseStatus.ACTIVE:
                         self.logger.error(f"Cookie池还有活跃的Cookie租用，无法删除: {pool_id}")
                         return False
                 
@@ -258,14 +258,14 @@ class CookieManager:
                 # 验证Cookie数据
                 self._validate_cookie(cookie_item, cookie_pool)
                 
-                # 检查是否已存在相同的Cookie
-                for existing_cookie in cookie_pool.cookies:
-                    if existing_cookie.value == cookie_item.value and existing_cookie.domain == cookie_item.domain:
+                # 检查是否已存在相同的Cookie（只查找同一域名下的Cookie）
+                for existing_cookie in cookie_pool.get_domain_cookies(cookie_item.domain):
+                    if existing_cookie.value == cookie_item.value:
                         self.logger.warning(f"Cookie已存在于池: {cookie_pool.id}")
                         return existing_cookie
                 
-                # 添加Cookie到池
-                cookie_pool.cookies.append(cookie_item)
+                # 添加Cookie到池（由Cookie池增量维护索引）
+                cookie_pool.add_cookie(cookie_item)
                 
                 # 保存更新后的Cookie池
                 await self._save_cookie_pools_to_storage()
@@ -337,11 +337,8 @@ class CookieManager:
                     return False
             
             try:
-                # 移除Cookie
-                original_count = len(cookie_pool.cookies)
-                cookie_pool.cookies = [c for c in cookie_pool.cookies if c.id != cookie_id]
-                
-                if len(cookie_pool.cookies) == original_count:
+                # 按ID移除Cookie（由Cookie池增量维护索引）
+                if not cookie_pool.remove_cookie_by_id(cookie_id):
                     self.logger.warning(f"Cookie不存在于池: {cookie_id} -> {pool_id}")
                     return False
                 
@@ -371,7 +368,7 @@ class CookieManager:
             cookie_pool = self.cookie_pools[pool_id]
             
             # 查找Cookie
-            cookie_item = next((c for c in cookie_pool.cookies if c.id == cookie_id), None)
+            cookie_item = cookie_pool.cookies_by_id.get(cookie_id)
             if not cookie_item:
                 self.logger.error(f"Cookie不存在: {cookie_id} -> {pool_id}")
                 return None
@@ -388,6 +385,10 @@ class CookieManager:
                             value = CookieStatus(value)
                         setattr(cookie_item, key, value)
                 
+                # 修改了Cookie池索引使用的字段时，下次查找前重建索引
+                if not updates.keys().isdisjoint(('domain', 'name', 'path')):
+                    cookie_pool.reindex()
+                
                 # 更新最后更新时间
                 cookie_item.updated_at = datetime.now(timezone.utc)
                 
@@ -452,8 +453,10 @@ class CookieManager:
                 
                 # 创建Cookie租用
                 lease = CookieLease(
+                    pool_id=pool_id,
+                    cookie_name=selected_cookie.name,
+                    domain=selected_cookie.domain,
                     cookie_id=selected_cookie.id,
-                    cookie_pool_id=pool_id,
                     task_id=task_id,
                     expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl)
                 )
@@ -578,7 +581,7 @@ class CookieManager:
         for lease_id in expired_lease_ids:
             if lease_id in self.cookie_leases:
                 del self.cookie_leases[lease_id]
-                self.logger.debug(f"清理过期的Cookie租用记录: {lease_id}")
+                self.logger.debug("清理过期的Cookie租用记录: %s", lease_id)
     
     async def _check_cookie_health(self, cookie_item: CookieItem, cookie_pool: CookiePool):
         """检查Cookie的健康状态
@@ -592,14 +595,14 @@ class CookieManager:
             
             # 如果Cookie池没有目标域名，跳过健康检查
             if not cookie_pool.target_domains:
-                self.logger.debug(f"跳过Cookie健康检查（没有目标域名）: {cookie_item.id}")
+                self.logger.debug("跳过Cookie健康检查（没有目标域名）: %s", cookie_item.id)
                 return
             
             # 选择一个目标域名进行健康检查
             target_domain = random.choice(cookie_pool.target_domains)
             test_url = f"https://{target_domain}"
             
-            self.logger.debug(f"开始Cookie健康检查: {cookie_item.id} -> {test_url}")
+            self.logger.debug("开始Cookie健康检查: %s -> %s", cookie_item.id, test_url)
             
             # 使用爬虫进行健康检查
             crawler = SmartCrawler(settings)
@@ -622,7 +625,7 @@ class CookieManager:
                     self.logger.warning(f"Cookie健康检查失败（需要登录）: {cookie_item.id} -> {test_url}")
                 else:
                     new_status = CookieStatus.VALID
-                    self.logger.debug(f"Cookie健康检查成功: {cookie_item.id} -> {test_url}")
+                    self.logger.debug("Cookie健康检查成功: %s -> %s", cookie_item.id, test_url)
             elif result['status_code'] == 403 or result['status_code'] == 401:
                 new_status = CookieStatus.INVALID
                 self.logger.warning(f"Cookie健康检查失败（权限错误）: {cookie_item.id} -> {test_url}, 状态码: {result['status_code']}")
@@ -690,12 +693,12 @@ class CookieManager:
                 return None
             
             # 查找Cookie池和Cookie
-            if lease.cookie_pool_id not in self.cookie_pools:
-                self.logger.error(f"Cookie池不存在: {lease.cookie_pool_id}")
+            if lease.pool_id not in self.cookie_pools:
+                self.logger.error(f"Cookie池不存在: {lease.pool_id}")
                 return None
             
-            cookie_pool = self.cookie_pools[lease.cookie_pool_id]
-            cookie_item = next((c for c in cookie_pool.cookies if c.id == lease.cookie_id), None)
+            cookie_pool = self.cookie_pools[lease.pool_id]
+            cookie_item = cookie_pool.cookies_by_id.get(lease.cookie_id)
             
             if not cookie_item:
                 self.logger.error(f"Cookie不存在: {lease.cookie_id}")
@@ -776,7 +779,7 @@ class CookieManager:
             # 统计活跃的租用数量
             active_leases = 0
             for lease in self.cookie_leases.values():
-                if lease.cookie_pool_id == pool_id and lease.status == LeaseStatus.ACTIVE:
+                if lease.pool_id == pool_id and lease.status == LeaseStatus.ACTIVE:
                     active_leases += 1
             
             # 计算平均健康分数（简化版）
@@ -2,10 +2,10 @@
 SmartCrawler 类 - 核心爬取功能
 """
 
+import logging
 import asyncio
 import httpx
 from bs4 import BeautifulSoup
-from smart_spider.utils.logger import get_logger
 from smart_spider.core.service import CrawlerService
 import urllib.parse
 
@@ -16,7 +16,7 @@ class SmartCrawler:
     def __init__(self, settings):
         """使用设置初始化爬虫"""
         self.settings = settings
-        self.logger = get_logger(__name__)
+        self.logger = logging.getLogger(__name__)
         self.visited_urls = set()
         self.service = CrawlerService(settings)
         
@@ -88,7 +88,7 @@ class SmartCrawler:
             return
         
         self.visited_urls.add(url)
-        self.logger.info(f"Crawling: {url}")
+        self.logger.info("Crawling: %s", url)
         
         self.metrics['total_count'] += 1
         
@@ -112,7 +112,7 @@ class SmartCrawler:
                     success = self.service.save_crawled_data(data)
                     if success:
                         self.metrics['success_count'] += 1
-                        self.logger.info(f"Successfully crawled and saved data from {url}")
+                        self.logger.info("Successfully crawled and saved data from %s", url)
                     else:
                         self.metrics['fail_count'] += 1
                         self.logger.error(f"Failed to save data from {url}")
@@ -185,7 +185,7 @@ class SmartCrawler:
             # 处理数据
             processed_data = self.service.process_crawled_data(data)
             
-            self.logger.debug(f"Extracted data: {processed_data}")
+            self.logger.debug("Extracted data: %s", processed_data)
             return processed_data
         except Exception as e:
             self.logger.error(f"Error extracting data from {url}: {e}")
@@ -2,6 +2,7 @@
 代理管理器 - 负责代理IP池管理、代理测试、健康检查和动态调度
 """
 
+import logging
 import os
 import asyncio
 import random
@@ -13,7 +14,7 @@ from urllib.parse import urlparse
 
 from smart_spider.core.storage import StorageManager
 from smart_spider.core.cache import get_cache
-from smart_spider.utils.logger import get_logger
+from smart_spider.models._compat import _IndexedList
 from smart_spider.settings import settings
 
 
@@ -207,6 +208,8 @@ class ProxyPool:
         self.proxies = proxies or []
         self.created_at = created_at or datetime.now(timezone.utc)
         self.updated_at = updated_at or datetime.now(timezone.utc)
+        # 按ID索引的代理，proxies被整体替换或在外部修改过时重建
+        self._by_id: Dict[str, ProxyItem] = {}
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -241,6 +244,18 @@ class ProxyPool:
         
         return cls(**data)
     
+    @property
+    def proxies_by_id(self) -> Dict[str, ProxyItem]:
+        """按ID索引的代理字典"""
+        proxies = self.proxies
+        if type(proxies) is not _IndexedList or proxies.dirty:
+            # 改用记录修改的列表，外部对proxies的任何增删改都会在下次查找前触发重建
+            if type(proxies) is not _IndexedList:
+                proxies = self.proxies = _IndexedList(proxies)
+            self._by_id = {proxy.id: proxy for proxy in proxies}
+            proxies.dirty = False
+        return self._by_id
+    
     @property
     def valid_proxy_count(self) -> int:
         """有效代理数量"""
@@ -283,7 +298,7 @@ class ProxyManager:
         self.proxy_pools: Dict[str, ProxyPool] = {}
         self.proxy_leases: Dict[str, ProxyLease] = {}
         self.pool_lock = asyncio.Lock()
-        self.logger = get_logger(__name__)
+        self.logger = logging.getLogger(__name__)
         self.storage = StorageManager.create_storage(settings.get('storage', {}))
         self.cache = get_cache('proxy_cache', {'type': 'memory', 'max_size': 1000, 'default_ttl': 600})
         self.health_check_intervals = {
@@ -629,7 +644,7 @@ class ProxyManager:
             proxy_pool = self.proxy_pools[pool_id]
             
             # 查找代理
-            proxy_item = next((p for p in proxy_pool.proxies if p.id == proxy_id), None)
+            proxy_item = proxy_pool.proxies_by_id.get(proxy_id)
             if not proxy_item:
                 self.logger.error(f"代理不存在: {proxy_id} -> {pool_id}")
                 return None
@@ -865,7 +880,7 @@ class ProxyManager:
         for lease_id in expired_lease_ids:
             if lease_id in self.proxy_leases:
                 del self.proxy_leases[lease_id]
-                self.logger.debug(f"清理过期的代理租用记录: {lease_id}")
+                self.logger.debug("清理过期的代理租用记录: %s", lease_id)
     
     async def _check_proxy_health(self, proxy_item: ProxyItem, proxy_pool: ProxyPool):
         """检查代理的健康状态
@@ -877,7 +892,7 @@ class ProxyManager:
             # 更新最后健康检查时间
             proxy_item.last_health_check = datetime.now(timezone.utc)
             
-            self.logger.debug(f"开始代理健康检查: {proxy_item.id} ({proxy_item.ip}:{proxy_item.port})")
+            self.logger.debug("开始代理健康检查: %s (%s:%s)", proxy_item.id, proxy_item.ip, proxy_item.port)
             
             # 测试代理的有效性
             test_results = await self._test_proxy(proxy_item)
@@ -896,7 +911,8 @@ class ProxyManager:
             if success_rate >= self.health_check_config['success_threshold'] and \
                avg_response_time <= self.health_check_config['max_response_time']:
                 new_status = ProxyStatus.VALID
-                self.logger.debug(f"代理健康检查成功: {proxy_item.id} ({proxy_item.ip}:{proxy_item.port}), 成功率: {success_rate:.2f}, 响应时间: {avg_response_time:.2f}s")
+                self.logger.debug("代理健康检查成功: %s (%s:%s), 成功率: %.2f, 响应时间: %.2fs",
+                                  proxy_item.id, proxy_item.ip, proxy_item.port, success_rate, avg_response_time)
             elif success_rate > 0:
                 new_status = ProxyStatus.WARNING
                 self.logger.warning(f"代理健康检查警告: {proxy_item.id} ({proxy_item.ip}:{proxy_item.port}), 成功率: {success_rate:.2f}, 响应时间: {avg_response_time:.2f}s")
@@ -1068,7 +1084,7 @@ class ProxyManager:
                 return None
             
             proxy_pool = self.proxy_pools[lease.proxy_pool_id]
-            proxy_item = next((p for p in proxy_pool.proxies if p.id == lease.proxy_id), None)
+            proxy_item = proxy_pool.proxies_by_id.get(lease.proxy_id)
             
             if not proxy_item:
                 self.logger.error(f"代理不存在: {lease.proxy_id}")
@@ -2,6 +2,7 @@
 SmartSpider 服务层 - 业务逻辑实现
 """
 
+import logging
 import os
 import json
 import asyncio
@@ -9,7 +10,6 @@ import hashlib
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
-from smart_spider.utils.logger import get_logger
 
 
 class CrawlerService:
@@ -18,7 +18,7 @@ class CrawlerService:
     def __init__(self, settings):
         """初始化爬虫服务"""
         self.settings = settings
-        self.logger = get_logger(__name__)
+        self.logger = logging.getLogger(__name__)
         
         # 初始化存储配置
         storage_config = self.settings.get('storage', {})
@@ -64,7 +64,7 @@ class CrawlerService:
             errors.append("concurrency必须是一个整数")
         
         # 检查选择器配置
-        if 'selectors' in config:
+        if config.get('selectors'):
             selectors = config['selectors']
             if 'items' in selectors and not isinstance(selectors['items'], dict):
                 errors.append("items选择器必须是一个字典")
@@ -105,7 +105,7 @@ class CrawlerService:
         if 'metadata' not in processed_data:
             processed_data['metadata'] = {}
         
-        self.logger.debug(f"处理后的数据: {processed_data}")
+        self.logger.debug("处理后的数据: %s", processed_data)
         return processed_data
     
     def save_crawled_data(self, data):
@@ -150,7 +150,7 @@ class CrawlerService:
                     f.write(f"标题: {data.get('title', '')}\n\n")
                     f.write(f"内容:\n{content}")
             
-            self.logger.info(f"数据保存到 {file_path}")
+            self.logger.info("数据保存到 %s", file_path)
             return True
         except Exception as e:
             self.logger.error(f"保存数据到文件错误: {e}")
@@ -168,7 +168,7 @@ class CrawlerService:
                 # 写入JSON行
                 f.write(json.dumps(data, ensure_ascii=False) + '\n')
             
-            self.logger.info(f"数据追加到 {file_path}")
+            self.logger.info("数据追加到 %s", file_path)
             return True
         except Exception as e:
             self.logger.error(f"保存数据到JSONL文件错误: {e}")
@@ -180,7 +180,7 @@ class CrawlerService:
             url = data.get('url', '')
             if url:
                 self.data_cache[url] = data
-                self.logger.debug(f"数据已缓存到URL: {url}")
+                self.logger.debug("数据已缓存到URL: %s", url)
     
     async def get_cached_data(self, url):
         """从内存缓存中获取数据"""
@@ -2,17 +2,19 @@
 存储模块 - 提供不同的存储后端支持
 """
 
+import logging
 import os
 import json
 import asyncio
 import csv
 import pickle
+import struct
+from collections import defaultdict
 from datetime import datetime
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Iterator, Union
+from typing import Dict, List, Any, Optional, Iterator, AsyncIterator, Union
 import aiofiles
 
-from smart_spider.utils.logger import get_logger
 
 
 class StorageBackend(ABC):
@@ -47,40 +49,78 @@ class StorageBackend(ABC):
     async def close(self) -> None:
         """关闭存储连接"""
         pass
+    
+    async def iter_jsonl(self, filename: str, skip: int = 0,
+                         take: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """按偏移量和数量逐条读取数据项（默认实现读取全部数据后切片）
+        Args:
+            filename: 文件名
+            skip: 跳过的数据项数量
+            take: 最多返回的数据项数量，None表示不限制
+        Yields:
+            Dict[str, Any]: 数据项
+        """
+        data = await self.get(filename=filename)
+        if isinstance(data, list):
+            stop = None if take is None else skip + take
+            for item in data[skip:stop]:
+                yield item
 
 
 class FileSystemStorage(StorageBackend):
     """文件系统存储后端"""
     
+    SUPPORTED_FORMATS = ('jsonl', 'json', 'csv', 'pickle')
+    
     def __init__(self, config: Dict[str, Any]):
         """初始化文件系统存储
         Args:
-            config: 存储配置，包含路径、格式等
+            config: 存储配置，包含路径、格式等；create_dir为False时不检查和创建存储目录
         """
         self.path = config.get('path', 'data')
         self.format = config.get('format', 'jsonl')  # jsonl, json, csv, pickle
-        self.logger = get_logger(__name__)
+        self.logger = logging.getLogger(__name__)
+        self._file_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)  # 按文件路径串行化写入
         
-        # 确保存储目录存在
-        os.makedirs(self.path, exist_ok=True)
+        # 确保存储目录存在（调用方已确认目录存在时跳过）
+        if config.get('create_dir', True):
+            os.makedirs(self.path, exist_ok=True)
         
         self.logger.info(f"初始化文件系统存储: 路径={self.path}, 格式={self.format}")
     
     async def save(self, data: Any, **kwargs) -> bool:
-        """保存数据到文件
+        """保存数据到文件（在线程中执行同步写入，同一文件的写入串行执行）
+        Args:
+            data: 要保存的数据，可以是字典或字典列表
+            **kwargs: 同save_sync
+        Returns:
+            bool: 是否保存成功
+        """
+        kwargs.setdefault('filename', self._get_default_filename())
+        filepath = os.path.join(self.path, kwargs['filename'])
+        
+        # 串行写入保证索引中的行偏移与文件内容一致
+        async with self._file_locks[filepath]:
+            return await asyncio.to_thread(self.save_sync, data, **kwargs)
+    
+    def save_sync(self, data: Any, **kwargs) -> bool:
+        """同步保存数据到文件，供已在线程中运行的调用方直接使用
         Args:
             data: 要保存的数据，可以是字典或字典列表
             **kwargs:
                 filename: 文件名，如果不提供则使用默认名称
                 overwrite: 是否覆盖现有文件
                 append: 是否追加到现有文件（仅对jsonl格式有效）
+                index: 是否维护行偏移索引文件，用于按偏移量随机读取（仅对jsonl格式有效，其他格式记录警告后忽略）
         Returns:
             bool: 是否保存成功
         """
-        filename: str = kwargs.get('filename', self._get_default_filename())
+        filename: str = kwargs.get('filename') or self._get_default_filename()
         filepath: str = os.path.join(self.path, filename)
         overwrite: bool = kwargs.get('overwrite', False)
         append: bool = kwargs.get('append', True) if self.format == 'jsonl' else False
+        if kwargs.get('index') and self.format != 'jsonl':
+            self.logger.warning("存储格式%s不支持行偏移索引，忽略index参数: %s", self.format, filepath)
         
         try:
             # 确保数据是列表格式并验证每个数据项
@@ -95,38 +135,83 @@ class FileSystemStorage(StorageBackend):
             mode: str = 'w' if overwrite else ('a' if append else 'w')
             
             # 根据文件格式调用对应的保存方法
-            save_methods = {
-                'jsonl': self._save_jsonl,
-                'json': self._save_json,
-                'csv': self._save_csv,
-                'pickle': self._save_pickle
-            }
-            
-            if self.format not in save_methods:
+            if self.format == 'jsonl':
+                self._save_jsonl(filepath, data, mode, overwrite, kwargs.get('index', False))
+            elif self.format == 'json':
+                self._save_json(filepath, data, mode, overwrite)
+            elif self.format == 'csv':
+                self._save_csv(filepath, data, mode, overwrite)
+            elif self.format == 'pickle':
+                self._save_pickle(filepath, data, mode, overwrite)
+            else:
                 raise ValueError(f"不支持的存储格式: {self.format}")
             
-            await save_methods[self.format](filepath, data, mode, overwrite)
-            self.logger.debug(f"成功保存数据到文件: {filepath}")
+            self.logger.debug("成功保存数据到文件: %s", filepath)
             return True
         except Exception as e:
             self.logger.error(f"保存数据到文件失败: {str(e)}")
             return False
     
-    async def _save_jsonl(self, filepath: str, data: List[Dict[str, Any]], mode: str) -> None:
-        """保存数据为JSON Lines格式"""
-        async with aiofiles.open(filepath, mode, encoding='utf-8') as f:
-            for item in data:
-                await f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    def _save_jsonl(self, filepath: str, data: List[Dict[str, Any]],
+                    mode: str, overwrite: bool, index: bool = False) -> None:
+        """保存数据为JSON Lines格式，要求索引或已有索引文件时同时维护行偏移索引文件"""
+        lines = [(json.dumps(item, ensure_ascii=False) + '\n').encode('utf-8') for item in data]
+        index_path = self._get_index_path(filepath)
+        # 已有索引文件时继续维护，避免覆盖或追加后索引与文件内容不一致
+        has_index = os.path.exists(index_path)
+        
+        with open(filepath, mode + 'b') as f:
+            # 追加时新行从当前文件末尾开始
+            position = f.tell()
+            f.write(b''.join(lines))
+        
+        if not index and not has_index:
+            return
+        # 已有数据但没有索引时（旧文件），不再创建索引，读取时回退为逐行扫描
+        if position > 0 and not has_index:
+            return
+        offsets = []
+        for line in lines:
+            offsets.append(position)
+            position += len(line)
+        with open(index_path, mode + 'b') as f:
+            f.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+    
+    @staticmethod
+    def _get_index_path(filepath: str) -> str:
+        """获取JSON Lines文件对应的行偏移索引文件路径"""
+        return os.path.splitext(filepath)[0] + '.idx'
+    
+    def _list_data_files(self) -> List[str]:
+        """列出存储目录中的数据文件名（不含JSON Lines的行偏移索引文件）"""
+        names = [f for f in os.listdir(self.path) if os.path.isfile(os.path.join(self.path, f))]
+        index_names = {self._get_index_path(f) for f in names if f.endswith('.jsonl')}
+        return [f for f in names if f not in index_names]
+    
+    async def _lookup_line_offset(self, filepath: str, line_no: int) -> Optional[int]:
+        """从索引文件中查找第line_no行的起始字节位置
+        Returns:
+            Optional[int]: 字节位置，索引不存在或行号超出范围时返回None
+        """
+        index_path = self._get_index_path(filepath)
+        if not os.path.exists(index_path):
+            return None
+        async with aiofiles.open(index_path, 'rb') as f:
+            await f.seek(line_no * 8)
+            raw = await f.read(8)
+        if len(raw) < 8:
+            return None
+        return struct.unpack('<Q', raw)[0]
     
-    async def _save_json(self, filepath: str, data: List[Dict[str, Any]], 
-                        mode: str, overwrite: bool) -> None:
+    def _save_json(self, filepath: str, data: List[Dict[str, Any]],
+                   mode: str, overwrite: bool) -> None:
         """保存数据为JSON格式"""
         # 如果是追加模式且文件存在，读取现有数据
         existing_data = []
         if mode == 'a' and os.path.exists(filepath):
             try:
-                async with aiofiles.open(filepath, 'r', encoding='utf-8') as f:
-                    content = await f.read()
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    content = f.read()
                     existing_data = json.loads(content) if content.strip() else []
             except Exception as e:
                 self.logger.warning(f"读取现有JSON文件失败，将创建新文件: {str(e)}")
@@ -138,11 +223,11 @@ class FileSystemStorage(StorageBackend):
             merged_data = existing_data + data
         
         # 写入文件
-        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(merged_data, ensure_ascii=False, indent=2))
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(merged_data, ensure_ascii=False, indent=2))
     
-    async def _save_csv(self, filepath: str, data: List[Dict[str, Any]], 
-                       mode: str, overwrite: bool) -> None:
+    def _save_csv(self, filepath: str, data: List[Dict[str, Any]],
+                  mode: str, overwrite: bool) -> None:
         """保存数据为CSV格式"""
         if not data:
             return
@@ -164,34 +249,25 @@ class FileSystemStorage(StorageBackend):
                 mode = 'w'
         
         # 写入文件
-        async with aiofiles.open(filepath, mode, encoding='utf-8', newline='') as f:
-            # 在追加模式下，如果文件为空，需要写入表头
-            if mode == 'a' and os.path.getsize(filepath) == 0:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                await writer.writeheader()
-            elif mode == 'w':
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                await writer.writeheader()
-                for item in data:
-                    # 确保每个项目都有所有字段
-                    row = {field: item.get(field, '') for field in fieldnames}
-                    await writer.writerow(row)
-            else:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                for item in data:
-                    # 确保每个项目都有所有字段
-                    row = {field: item.get(field, '') for field in fieldnames}
-                    await writer.writerow(row)
+        with open(filepath, mode, encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            # 新文件或空文件需要写入表头
+            if mode == 'w' or f.tell() == 0:
+                writer.writeheader()
+            for item in data:
+                # 确保每个项目都有所有字段
+                row = {field: item.get(field, '') for field in fieldnames}
+                writer.writerow(row)
     
-    async def _save_pickle(self, filepath: str, data: List[Dict[str, Any]], 
-                          mode: str, overwrite: bool) -> None:
+    def _save_pickle(self, filepath: str, data: List[Dict[str, Any]],
+                     mode: str, overwrite: bool) -> None:
         """保存数据为pickle格式"""
         # 如果是追加模式且文件存在，读取现有数据
         existing_data = []
         if mode == 'a' and os.path.exists(filepath):
             try:
-                async with aiofiles.open(filepath, 'rb') as f:
-                    content = await f.read()
+                with open(filepath, 'rb') as f:
+                    content = f.read()
                     existing_data = pickle.loads(content) if content else []
             except Exception as e:
                 self.logger.warning(f"读取现有pickle文件失败，将创建新文件: {str(e)}")
@@ -203,8 +279,8 @@ class FileSystemStorage(StorageBackend):
             merged_data = existing_data + data
         
         # 写入文件
-        async with aiofiles.open(filepath, 'wb') as f:
-            await f.write(pickle.dumps(merged_data))
+        with open(filepath, 'wb') as f:
+            f.write(pickle.dumps(merged_data))
     
     async def get(self, **kwargs) -> Any:
         """从文件获取数据
@@ -262,6 +338,50 @@ class FileSystemStorage(StorageBackend):
                     data.append(json.loads(line))
         return data
     
+    async def iter_jsonl(self, filename: str, skip: int = 0,
+                         take: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """流式读取JSON Lines文件中的一段数据，内存占用只与take相关
+        Args:
+            filename: 文件名
+            skip: 跳过的数据项数量
+            take: 最多返回的数据项数量，None表示不限制
+        Yields:
+            Dict[str, Any]: 数据项
+        """
+        if self.format != 'jsonl':
+            async for item in super().iter_jsonl(filename, skip, take):
+                yield item
+            return
+        
+        filepath = os.path.join(self.path, filename)
+        if not os.path.exists(filepath):
+            self.logger.warning(f"文件不存在: {filepath}")
+            return
+        if take is not None and take <= 0:
+            return
+        
+        # 有行偏移索引时直接定位到起始行，否则逐行跳过
+        start = await self._lookup_line_offset(filepath, skip) if skip > 0 else None
+        if start is not None:
+            skip = 0
+        
+        skipped = 0
+        taken = 0
+        async with aiofiles.open(filepath, 'rb') as f:
+            if start is not None:
+                await f.seek(start)
+            async for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if skipped < skip:
+                    skipped += 1
+                    continue
+                yield json.loads(line.decode('utf-8'))
+                taken += 1
+                if take is not None and taken >= take:
+                    return
+    
     async def _read_json(self, filepath: str) -> Any:
         """读取JSON格式文件"""
         async with aiofiles.open(filepath, 'r', encoding='utf-8') as f:
@@ -323,15 +443,18 @@ class FileSystemStorage(StorageBackend):
                     new_data = [item for item in data if not (isinstance(item, dict) and item.get('id') == item_id)]
                     if len(new_data) < len(data):
                         await self.save(new_data, filename=filename, overwrite=True)
-                        self.logger.debug(f"成功删除ID为 {item_id} 的项目")
+                        self.logger.debug("成功删除ID为 %s 的项目", item_id)
                         return True
                     else:
                         self.logger.warning(f"未找到ID为 {item_id} 的项目")
                         return False  # 未找到指定项目视为删除失败
             
-            # 否则删除整个文件
+            # 否则删除整个文件（连同行偏移索引）
             os.remove(filepath)
-            self.logger.debug(f"成功删除文件: {filepath}")
+            index_path = self._get_index_path(filepath)
+            if filepath.endswith('.jsonl') and os.path.exists(index_path):
+                os.remove(index_path)
+            self.logger.debug("成功删除文件: %s", filepath)
             return True
         except Exception as e:
             self.logger.error(f"删除文件失败: {str(e)}")
@@ -359,17 +482,16 @@ class FileSystemStorage(StorageBackend):
             # 列出所有文件
             try:
                 files = []
-                for f in os.listdir(self.path):
+                for f in self._list_data_files():
                     filepath = os.path.join(self.path, f)
-                    if os.path.isfile(filepath):
-                        stat = os.stat(filepath)
-                        files.append({
-                            'name': f,
-                            'path': filepath,
-                            'size': stat.st_size,
-                            'created_at': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                            'modified_at': datetime.fromtimestamp(stat.st_mtime).isoformat()
-                        })
+                    stat = os.stat(filepath)
+                    files.append({
+                        'name': f,
+                        'path': filepath,
+                        'size': stat.st_size,
+                        'created_at': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                        'modified_at': datetime.fromtimestamp(stat.st_mtime).isoformat()
+                    })
                 return files
             except Exception as e:
                 self.logger.error(f"列出文件失败: {str(e)}")
@@ -397,7 +519,7 @@ class FileSystemStorage(StorageBackend):
         else:
             # 统计所有文件数量
             try:
-                return len([f for f in os.listdir(self.path) if os.path.isfile(os.path.join(self.path, f))])
+                return len(self._list_data_files())
             except Exception as e:
                 self.logger.error(f"统计文件数量失败: {str(e)}")
                 return 0
@@ -418,7 +540,7 @@ class MemoryStorage(StorageBackend):
     def __init__(self, config: Dict[str, Any] = None):
         """初始化内存存储"""
         self.data = {}
-        self.logger = get_logger(__name__)
+        self.logger = logging.getLogger(__name__)
         self.logger.info("初始化内存存储")
     
     async def save(self, data: Any, **kwargs) -> bool:
@@ -444,7 +566,7 @@ class MemoryStorage(StorageBackend):
                 return False
             
             self.data[key] = data
-            self.logger.debug(f"成功保存数据到内存: {key}")
+            self.logger.debug("成功保存数据到内存: %s", key)
             return True
         except Exception as e:
             self.logger.error(f"保存数据到内存失败: {str(e)}")
@@ -481,7 +603,7 @@ class MemoryStorage(StorageBackend):
         try:
             if key in self.data:
                 del self.data[key]
-                self.logger.debug(f"成功从内存删除数据: {key}")
+                self.logger.debug("成功从内存删除数据: %s", key)
                 return True
             else:
                 self.logger.warning(f"键 '{key}' 不存在")
@@ -2,48 +2,164 @@
 任务管理器 - 负责创建、启动、暂停、停止和监控爬虫任务
 """
 
+import logging
 import os
+import sys
+import time
 import asyncio
-import json
-from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional, Union
-from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Union, Set, Callable, Coroutine
 
 from smart_spider.models.task import Task, TaskStatus, TaskConfig, TaskMetrics
 from smart_spider.core.crawler import SmartCrawler
 from smart_spider.core.service import CrawlerService
-from smart_spider.core.storage import StorageManager
+from smart_spider.core.storage import FileSystemStorage, StorageManager
 from smart_spider.core.cache import get_cache
-from smart_spider.utils.logger import get_logger
 from smart_spider.settings import settings
 
 
+class _CoalescedProgress:
+    """队列满后合并的进度
+
+    计数器是绝对值，只保留最新的值；URL按顺序累加，最多保留URL_LIMIT条，
+    其余只计数。计数器之后到达的URL各自使计数加一，应用结果与逐条应用一致。
+    """
+
+    URL_LIMIT = 10_000  # 每类URL最多暂存的条数
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}  # 最新的success_count/fail_count/total_count
+        self.crawled_urls: List[str] = []  # 已爬取的URL
+        self.error_urls: List[str] = []  # 爬取失败的URL
+        self.crawled_dropped = 0  # 超出暂存上限、只计数的已爬取URL数量
+        self.error_dropped = 0  # 超出暂存上限、只计数的失败URL数量
+        self.success_delta = 0  # 最新success_count之后到达的已爬取URL数量
+        self.fail_delta = 0  # 最新fail_count之后到达的失败URL数量
+
+    def add(self, progress: Dict[str, Any]):
+        """合并一条进度信息"""
+        for key in ('success_count', 'fail_count', 'total_count'):
+            if key in progress:
+                self.counters[key] = progress[key]
+        if 'success_count' in progress:
+            self.success_delta = 0
+        if 'fail_count' in progress:
+            self.fail_delta = 0
+        if progress.get('crawled_url'):
+            self.success_delta += 1
+            if len(self.crawled_urls) < self.URL_LIMIT:
+                self.crawled_urls.append(progress['crawled_url'])
+            else:
+                self.crawled_dropped += 1
+        if progress.get('error_url'):
+            self.fail_delta += 1
+            if len(self.error_urls) < self.URL_LIMIT:
+                self.error_urls.append(progress['error_url'])
+            else:
+                self.error_dropped += 1
+
+    def apply_to(self, task: Task):
+        """将合并后的进度应用到任务指标"""
+        metrics = task.metrics
+        if self.counters:
+            task.update_metrics(**self.counters)
+        for url in self.crawled_urls:
+            metrics.add_crawled_url(url)
+        for url in self.error_urls:
+            metrics.add_error_url(url)
+        metrics.crawled_total += self.crawled_dropped
+        metrics.error_total += self.error_dropped
+        task.update_metrics(success_count=metrics.success_count + self.success_delta,
+                            fail_count=metrics.fail_count + self.fail_delta)
+
+
+class _ProgressQueue(asyncio.Queue):
+    """任务进度队列
+
+    队列已满时不丢弃进度，也不无限增长：新到的进度合并到一个待处理的合并进度中，
+    此后的进度也继续合并以保持顺序，直到消费协程取空队列后取走合并进度。
+    """
+
+    def __init__(self, maxsize: int = 0):
+        super().__init__(maxsize=maxsize)
+        self.pending: Optional[_CoalescedProgress] = None  # 队列满后合并的进度
+        self.closed = False  # 是否已停止接收进度
+
+    def put_progress(self, progress: Dict[str, Any]):
+        """放入进度，队列已满或已有合并进度时合并到合并进度中"""
+        if self.pending is None:
+            try:
+                self.put_nowait(progress)
+                return
+            except asyncio.QueueFull:
+                self.pending = _CoalescedProgress()
+        self.pending.add(progress)
+    
+    def take_pending(self) -> Optional[_CoalescedProgress]:
+        """取走合并进度（只在队列取空后调用，保证其晚于队列中的所有进度）"""
+        pending, self.pending = self.pending, None
+        return pending
+    
+    def close(self):
+        """停止接收进度；队列未满时放入None唤醒消费协程，否则由消费协程取空队列后退出"""
+        self.closed = True
+        try:
+            self.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
 class TaskManager:
     """任务管理器类"""
     
-    _instance = None
-    
-    def __new__(cls):
-        """单例模式"""
-        if cls._instance is None:
-            cls._instance = super(TaskManager, cls).__new__(cls)
-            cls._instance._init()
-        return cls._instance
+    PROGRESS_QUEUE_SIZE = 256  # 每个任务进度队列的最大长度
+    PROGRESS_BATCH_SIZE = 32  # 每次合并处理的最大进度事件数
     
-    def _init(self):
+    def __init__(self):
         """初始化任务管理器"""
         self.tasks: Dict[str, Task] = {}
         self.crawlers: Dict[str, SmartCrawler] = {}
-        self.task_lock = asyncio.Lock()
-        self.logger = get_logger(__name__)
+        self.task_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)  # 按任务ID分片的锁
+        self._registry_lock = asyncio.Lock()  # 仅保护self.tasks的增删
+        self._by_status: Dict[TaskStatus, Set[str]] = {s: set() for s in TaskStatus}  # 按状态索引的任务ID
+        self.logger = logging.getLogger(__name__)
         self.storage = StorageManager.create_storage(settings.get('storage', {}))
+        # 任务结果固定以JSON Lines格式追加写入，不受全局存储格式影响，分页查询可流式读取
+        self.results_storage = FileSystemStorage({
+            'path': settings.get('storage.path', 'data'),
+            'format': 'jsonl'
+        })
+        self.service = CrawlerService(settings)
         self.cache = get_cache('task_cache', {'type': 'memory', 'max_size': 100, 'default_ttl': 300})
-        self.executor = ThreadPoolExecutor(max_workers=settings.get('max_workers', 10))
-        self.task_monitors = {}
+        self._results_cache_keys: Dict[str, Set[str]] = defaultdict(set)  # 每个任务已缓存的结果键
+        self._progress_queues: Dict[str, _ProgressQueue] = {}  # 每个运行中任务的进度队列
+        self._bg_tasks: Set[asyncio.Task] = set()  # 后台任务的强引用，防止被垃圾回收
+        self._monitor_task: Optional[asyncio.Task] = None  # 全局任务监控协程
+        self._export_dir = settings.get('export.path', 'exports')  # 默认导出目录（首次导出时创建）
+        self._export_dir_created = False  # 默认导出目录是否已创建
         self.loaded_tasks = False
         
         self.logger.info("任务管理器初始化成功")
     
+    def _spawn(self, coro: Coroutine, name: str) -> asyncio.Task:
+        """创建带名称的后台任务，便于按名称前缀排查
+        Args:
+            coro: 协程对象
+            name: 任务名称，如crawler:<task_id>
+        Returns:
+            asyncio.Task: 创建的任务
+        """
+        loop = asyncio.get_running_loop()
+        if sys.version_info >= (3, 11):
+            bg_task = loop.create_task(coro, name=name, context=contextvars.copy_context())
+        else:
+            bg_task = loop.create_task(coro, name=name)
+        # 事件循环只持有任务的弱引用，需自行保存直到任务结束
+        self._bg_tasks.add(bg_task)
+        bg_task.add_done_callback(self._bg_tasks.discard)
+        return bg_task
+    
     async def ensure_tasks_loaded(self):
         """确保任务已从存储加载（延迟加载机制）"""
         if not self.loaded_tasks:
@@ -62,12 +178,35 @@ class TaskManager:
                         if not task.is_terminated():
                             task.status = TaskStatus.PENDING  # 重启后将所有任务设置为等待状态
                             self.tasks[task.id] = task
+                            self._by_status[task.status].add(task.id)
                             self.logger.info(f"加载任务: {task.id} - {task.config.name}")
                     except Exception as e:
                         self.logger.error(f"加载任务失败: {str(e)}")
         except Exception as e:
             self.logger.error(f"从存储加载任务失败: {str(e)}")
     
+    def _reindex(self, task_id: str, old_status: TaskStatus, new_status: TaskStatus):
+        """在状态索引中移动任务ID
+        Args:
+            task_id: 任务ID
+            old_status: 原状态
+            new_status: 新状态
+        """
+        if old_status != new_status:
+            self._by_status[old_status].discard(task_id)
+            self._by_status[new_status].add(task_id)
+    
+    def _change_status(self, task: Task, change: Callable[..., None], *args):
+        """执行任务状态变更并同步状态索引
+        Args:
+            task: 任务对象
+            change: 任务的状态变更方法，如task.pause
+            *args: 传给变更方法的参数
+        """
+        old_status = task.status
+        change(*args)
+        self._reindex(task.id, old_status, task.status)
+    
     async def _save_tasks_to_storage(self):
         """将任务保存到存储"""
         try:
@@ -84,32 +223,57 @@ class TaskManager:
         Returns:
             Task: 创建的任务对象
         """
-        async with self.task_lock:
-            try:
-                # 转换配置格式
-                if isinstance(config, dict):
-                    task_config = TaskConfig.from_dict(config)
-                else:
-                    task_config = config
-                
-                # 验证配置
-                service = CrawlerService(settings)
-                validation_result = await service.validate_crawler_config(task_config.to_dict())
-                if not validation_result['valid']:
-                    raise ValueError(f"任务配置无效: {validation_result['errors']}")
-                
-                # 创建任务
-                task = Task(config=task_config)
+        try:
+            # 创建任务
+            task = Task(config=self._prepare_config(config))
+            async with self._registry_lock:
                 self.tasks[task.id] = task
-                
-                # 保存任务到存储
-                await self._save_tasks_to_storage()
-                
-                self.logger.info(f"创建任务成功: {task.id} - {task.config.name}")
-                return task
-            except Exception as e:
-                self.logger.error(f"创建任务失败: {str(e)}")
-                raise
+                self._by_status[task.status].add(task.id)
+            
+            # 保存任务到存储
+            await self._save_tasks_to_storage()
+            
+            self.logger.info(f"创建任务成功: {task.id} - {task.config.name}")
+            return task
+        except Exception as e:
+            self.logger.error(f"创建任务失败: {str(e)}")
+            raise
+    
+    async def create_tasks(self, configs: List[Union[Dict[str, Any], TaskConfig]]) -> List[Task]:
+        """批量创建任务，所有配置验证通过后才会创建，并只保存一次
+        Args:
+            configs: 任务配置列表，元素可以是字典或TaskConfig对象
+        Returns:
+            List[Task]: 创建的任务对象列表
+        """
+        try:
+            tasks = [Task(config=self._prepare_config(config)) for config in configs]
+            async with self._registry_lock:
+                for task in tasks:
+                    self.tasks[task.id] = task
+                    self._by_status[task.status].add(task.id)
+            
+            # 保存任务到存储
+            await self._save_tasks_to_storage()
+            
+            self.logger.info(f"批量创建任务成功: {len(tasks)} 个")
+            return tasks
+        except Exception as e:
+            self.logger.error(f"批量创建任务失败: {str(e)}")
+            raise
+    
+    def _prepare_config(self, config: Union[Dict[str, Any], TaskConfig]) -> TaskConfig:
+        """转换并验证任务配置
+        Args:
+            config: 任务配置，可以是字典或TaskConfig对象
+        Returns:
+            TaskConfig: 验证通过的任务配置
+        """
+        task_config = config if isinstance(config, TaskConfig) else TaskConfig.from_dict(config)
+        is_valid, errors = self.service.validate_crawler_config(task_config.to_dict())
+        if not is_valid:
+            raise ValueError(f"任务配置无效: {errors}")
+        return task_config
     
     async def start_task(self, task_id: str) -> bool:
         """启动任务
@@ -118,40 +282,56 @@ class TaskManager:
         Returns:
             bool: 是否启动成功
         """
-        async with self.task_lock:
-            if task_id not in self.tasks:
-                self.logger.error(f"任务不存在: {task_id}")
-                return False
+        if task_id not in self.tasks:
+            self.logger.error(f"任务不存在: {task_id}")
+            return False
+        
+        async with self.task_locks[task_id]:
+            return await self._start_task(task_id)
+    
+    async def _start_task(self, task_id: str) -> bool:
+        """启动任务（调用方需持有该任务的锁）
+        Args:
+            task_id: 任务ID
+        Returns:
+            bool: 是否启动成功
+        """
+        task = self.tasks.get(task_id)
+        if not task:
+            self.logger.error(f"任务不存在: {task_id}")
+            return False
+        
+        if task.status == TaskStatus.RUNNING:
+            self.logger.warning(f"任务已经在运行中: {task_id}")
+            return True
+        
+        try:
+            # 创建爬虫实例
+            crawler = SmartCrawler(settings)
+            self.crawlers[task_id] = crawler
             
-            task = self.tasks[task_id]
-            if task.status == TaskStatus.RUNNING:
-                self.logger.warning(f"任务已经在运行中: {task_id}")
-                return True
+            # 更新任务状态
+            self._change_status(task, task.update_status, TaskStatus.RUNNING)
             
-            try:
-                # 创建爬虫实例
-                crawler = SmartCrawler(settings)
-                self.crawlers[task_id] = crawler
-                
-                # 更新任务状态
-                task.update_status(TaskStatus.RUNNING)
-                
-                # 保存任务状态
-                await self._save_tasks_to_storage()
-                
-                # 启动爬虫任务
-                asyncio.create_task(self._run_crawler(task_id, crawler))
-                
-                # 启动任务监控
-                self._start_task_monitor(task_id)
-                
-                self.logger.info(f"启动任务成功: {task_id} - {task.config.name}")
-                return True
-            except Exception as e:
-                self.logger.error(f"启动任务失败: {str(e)}")
-                task.mark_as_failed(str(e))
-                await self._save_tasks_to_storage()
-                return False
+            # 保存任务状态
+            await self._save_tasks_to_storage()
+            
+            # 启动进度消费协程
+            self._start_progress_worker(task_id)
+            
+            # 启动爬虫任务
+            self._spawn(self._run_crawler(task_id, crawler), name=f'crawler:{task_id}')
+            
+            # 确保全局任务监控已启动
+            self._ensure_monitor()
+            
+            self.logger.info(f"启动任务成功: {task_id} - {task.config.name}")
+            return True
+        except Exception as e:
+            self.logger.error(f"启动任务失败: {str(e)}")
+            self._change_status(task, task.mark_as_failed, str(e))
+            await self._save_tasks_to_storage()
+            return False
     
     async def _run_crawler(self, task_id: str, crawler: SmartCrawler):
         """运行爬虫任务
@@ -188,63 +368,161 @@ class TaskManager:
                 self._on_crawl_complete    # 完成回调
             )
             
-            # 处理结果
-            service = CrawlerService(settings)
-            processed_data = await service.process_crawled_data(results)
-            
-            # 保存结果
-            save_config = task.config.storage_config or {'format': 'jsonl'}
-            await service.save_crawled_data(
-                processed_data,
-                task_id=task_id,
-                **save_config
-            )
+            # 处理并保存结果
+            await self._save_task_results(task_id, results or [])
             
             # 更新任务状态为完成
-            task.update_status(TaskStatus.COMPLETED)
+            self._change_status(task, task.update_status, TaskStatus.COMPLETED)
             
         except Exception as e:
             self.logger.error(f"任务执行失败: {task_id} - {str(e)}")
-            task.mark_as_failed(str(e))
+            self._change_status(task, task.mark_as_failed, str(e))
         finally:
             # 清理资源
             if task_id in self.crawlers:
                 del self.crawlers[task_id]
             
-            # 停止任务监控
-            self._stop_task_monitor(task_id)
+            # 停止进度消费协程（处理完队列中剩余的进度后退出）
+            self._stop_progress_worker(task_id)
             
             # 保存任务状态
             await self._save_tasks_to_storage()
     
+    async def _save_task_results(self, task_id: str, results: List[Dict[str, Any]]):
+        """处理爬取结果并追加到任务结果文件（JSON Lines），写入后清除该任务的结果缓存；
+        任务配置了storage_config时，再按该配置另存一份结果
+        Args:
+            task_id: 任务ID
+            results: 原始爬取结果列表
+        Raises:
+            OSError: 写入结果文件失败时抛出
+        """
+        processed_data = [self.service.process_crawled_data(item) for item in results]
+        if processed_data:
+            if not await self.results_storage.save(processed_data, filename=f'{task_id}_results.jsonl', index=True):
+                raise OSError(f"保存任务结果失败: {task_id}")
+    
+        # 结果已更新，清除该任务的结果缓存
+        await self._invalidate_results_cache(task_id)
+        
+        task = self.tasks.get(task_id)
+        storage_config = task.config.storage_config if task else None
+        if processed_data and storage_config:
+            await self._save_results_copy(task_id, processed_data, storage_config)
+    
+    async def _save_results_copy(self, task_id: str, processed_data: List[Dict[str, Any]],
+                                 storage_config: Dict[str, Any]):
+        """按任务的存储配置另存一份结果，未配置的项沿用全局存储设置
+        Args:
+            task_id: 任务ID
+            processed_data: 处理后的结果列表
+            storage_config: 任务的存储配置，可额外指定filename
+        Raises:
+            OSError: 写入失败时抛出
+        """
+        config = {**settings.get('storage', {}), **storage_config}
+        filename = config.get('filename') or f"{task_id}_results.{config.get('format', 'jsonl')}"
+        storage = StorageManager.create_storage(config)
+        if not await storage.save(processed_data, filename=filename):
+            raise OSError(f"按任务存储配置保存结果失败: {task_id}")
+    
     def _on_crawl_progress(self, task_id: str, progress: Dict[str, Any]):
-        """爬取进度回调
+        """爬取进度回调，将进度放入任务的有界队列，由消费协程批量处理
+        Args:
+            task_id: 任务ID
+            progress: 进度信息
+        """
+        queue = self._progress_queues.get(task_id)
+        if queue is None:
+            return
+        queue.put_progress(progress)
+    
+    def _start_progress_worker(self, task_id: str):
+        """为任务创建进度队列并启动消费协程
+        Args:
+            task_id: 任务ID
+        """
+        self._stop_progress_worker(task_id)
+        queue = _ProgressQueue(maxsize=self.PROGRESS_QUEUE_SIZE)
+        self._progress_queues[task_id] = queue
+        self._spawn(self._progress_worker(task_id, queue), name=f'progress:{task_id}')
+    
+    def _stop_progress_worker(self, task_id: str):
+        """停止接收任务进度，消费协程处理完剩余进度后退出
         Args:
             task_id: 任务ID
+        """
+        queue = self._progress_queues.pop(task_id, None)
+        if queue is not None:
+            queue.close()
+    
+    async def _progress_worker(self, task_id: str, queue: _ProgressQueue):
+        """进度消费协程，每次取出一批进度合并后更新一次任务
+        Args:
+            task_id: 任务ID
+            queue: 进度队列
+        """
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.PROGRESS_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            updates = [progress for progress in batch if progress is not None]
+            done = len(updates) < len(batch)  # 取到了结束标记None
+            pending = None
+            if queue.empty():
+                pending = queue.take_pending()
+                done = done or queue.closed
+            if updates or pending:
+                try:
+                    await self._apply_progress(task_id, updates, pending)
+                except Exception as e:
+                    self.logger.error(f"更新任务进度失败: {task_id} - {str(e)}")
+            
+            if done:
+                return
+    
+    async def _apply_progress(self, task_id: str, updates: List[Dict[str, Any]],
+                              pending: Optional[_CoalescedProgress] = None):
+        """按顺序应用一批进度并保存一次任务
+        Args:
+            task_id: 任务ID
+            updates: 进度信息列表
+            pending: 晚于updates的合并进度
+        """
+        if task_id not in self.tasks:
+            return
+        async with self.task_locks[task_id]:
+            task = self.tasks.get(task_id)
+            if not task:
+                return
+            
+            # 逐条更新指标：计数器是绝对值，URL会累加计数，合并后的结果必须与逐条应用一致
+            for progress in updates:
+                self._apply_progress_event(task, progress)
+            if pending is not None:
+                pending.apply_to(task)
+            
+            # 保存进度
+            await self._save_tasks_to_storage()
+    
+    @staticmethod
+    def _apply_progress_event(task: Task, progress: Dict[str, Any]):
+        """用一条进度信息更新任务指标
+        Args:
+            task: 任务
             progress: 进度信息
         """
-        async def update_progress():
-            async with self.task_lock:
-                if task_id in self.tasks:
-                    task = self.tasks[task_id]
-                    
-                    # 更新指标
-                    if 'success_count' in progress:
-                        task.update_metrics(success_count=progress['success_count'])
-                    if 'fail_count' in progress:
-                        task.update_metrics(fail_count=progress['fail_count'])
-                    if 'total_count' in progress:
-                        task.update_metrics(total_count=progress['total_count'])
-                    if 'crawled_url' in progress:
-                        task.update_metrics(crawled_url=progress['crawled_url'])
-                    if 'error_url' in progress:
-                        task.update_metrics(error_url=progress['error_url'])
-                    
-                    # 保存进度
-                    await self._save_tasks_to_storage()
-        
-        # 使用asyncio.create_task来避免阻塞爬虫
-        asyncio.create_task(update_progress())
+        if 'success_count' in progress:
+            task.update_metrics(success_count=progress['success_count'])
+        if 'fail_count' in progress:
+            task.update_metrics(fail_count=progress['fail_count'])
+        if 'total_count' in progress:
+            task.update_metrics(total_count=progress['total_count'])
+        if 'crawled_url' in progress:
+            task.update_metrics(crawled_url=progress['crawled_url'])
+        if 'error_url' in progress:
+            task.update_metrics(error_url=progress['error_url'])
     
     def _on_crawl_complete(self, task_id: str, success: bool, results: Any = None):
         """爬取完成回调
@@ -262,12 +540,14 @@ class TaskManager:
         Returns:
             bool: 是否暂停成功
         """
-        async with self.task_lock:
-            if task_id not in self.tasks:
-                self.logger.error(f"任务不存在: {task_id}")
+        if task_id not in self.tasks:
+            self.logger.error(f"任务不存在: {task_id}")
+            return False
+        
+        async with self.task_locks[task_id]:
+            task = self.tasks.get(task_id)
+            if not task:
                 return False
-            
-            task = self.tasks[task_id]
             if task.status != TaskStatus.RUNNING:
                 self.logger.warning(f"任务不在运行状态，无法暂停: {task_id} - {task.status}")
                 return False
@@ -279,7 +559,7 @@ class TaskManager:
                     await crawler.pause()
                 
                 # 更新任务状态
-                task.pause()
+                self._change_status(task, task.pause)
                 
                 # 保存任务状态
                 await self._save_tasks_to_storage()
@@ -297,12 +577,14 @@ class TaskManager:
         Returns:
             bool: 是否恢复成功
         """
-        async with self.task_lock:
-            if task_id not in self.tasks:
-                self.logger.error(f"任务不存在: {task_id}")
+        if task_id not in self.tasks:
+            self.logger.error(f"任务不存在: {task_id}")
+            return False
+        
+        async with self.task_locks[task_id]:
+            task = self.tasks.get(task_id)
+            if not task:
                 return False
-            
-            task = self.tasks[task_id]
             if task.status != TaskStatus.PAUSED:
                 self.logger.warning(f"任务不在暂停状态，无法恢复: {task_id} - {task.status}")
                 return False
@@ -313,11 +595,11 @@ class TaskManager:
                     crawler = self.crawlers[task_id]
                     await crawler.resume()
                 else:
-                    # 如果爬虫不存在，重新创建并启动
-                    await self.start_task(task_id)
+                    # 如果爬虫不存在，重新创建并启动（已持有锁，直接调用内部方法）
+                    await self._start_task(task_id)
                 
                 # 更新任务状态
-                task.resume()
+                self._change_status(task, task.resume)
                 
                 # 保存任务状态
                 await self._save_tasks_to_storage()
@@ -335,37 +617,50 @@ class TaskManager:
         Returns:
             bool: 是否停止成功
         """
-        async with self.task_lock:
-            if task_id not in self.tasks:
-                self.logger.error(f"任务不存在: {task_id}")
-                return False
+        if task_id not in self.tasks:
+            self.logger.error(f"任务不存在: {task_id}")
+            return False
+        
+        async with self.task_locks[task_id]:
+            return await self._stop_task(task_id)
+    
+    async def _stop_task(self, task_id: str, persist: bool = True) -> bool:
+        """停止任务（调用方需持有该任务的锁）
+        Args:
+            task_id: 任务ID
+            persist: 是否立即保存任务状态到存储
+        Returns:
+            bool: 是否停止成功
+        """
+        task = self.tasks.get(task_id)
+        if not task:
+            self.logger.error(f"任务不存在: {task_id}")
+            return False
+        
+        if task.is_terminated():
+            self.logger.warning(f"任务已经终止，无需停止: {task_id} - {task.status}")
+            return True
+        
+        try:
+            # 停止爬虫
+            if task_id in self.crawlers:
+                crawler = self.crawlers[task_id]
+                await crawler.stop()
+                del self.crawlers[task_id]
+            self._stop_progress_worker(task_id)
             
-            task = self.tasks[task_id]
-            if task.is_terminated():
-                self.logger.warning(f"任务已经终止，无需停止: {task_id} - {task.status}")
-                return True
+            # 更新任务状态
+            self._change_status(task, task.stop)
             
-            try:
-                # 停止爬虫
-                if task_id in self.crawlers:
-                    crawler = self.crawlers[task_id]
-                    await crawler.stop()
-                    del self.crawlers[task_id]
-                
-                # 更新任务状态
-                task.stop()
-                
-                # 停止任务监控
-                self._stop_task_monitor(task_id)
-                
-                # 保存任务状态
+            # 保存任务状态
+            if persist:
                 await self._save_tasks_to_storage()
-                
-                self.logger.info(f"停止任务成功: {task_id} - {task.config.name}")
-                return True
-            except Exception as e:
-                self.logger.error(f"停止任务失败: {str(e)}")
-                return False
+            
+            self.logger.info(f"停止任务成功: {task_id} - {task.config.name}")
+            return True
+        except Exception as e:
+            self.logger.error(f"停止任务失败: {str(e)}")
+            return False
     
     async def delete_task(self, task_id: str) -> bool:
         """删除任务
@@ -374,32 +669,35 @@ class TaskManager:
         Returns:
             bool: 是否删除成功
         """
-        async with self.task_lock:
-            if task_id not in self.tasks:
-                self.logger.error(f"任务不存在: {task_id}")
+        if task_id not in self.tasks:
+            self.logger.error(f"任务不存在: {task_id}")
+            return False
+        
+        async with self.task_locks[task_id]:
+            task = self.tasks.get(task_id)
+            if not task:
                 return False
-            
-            task = self.tasks[task_id]
             if task.status == TaskStatus.RUNNING:
                 self.logger.error(f"任务正在运行中，无法删除: {task_id}")
                 return False
             
             try:
-                # 停止任务（如果还在运行）
+                # 停止任务（如果还在运行，已持有锁，直接调用内部方法）
                 if task.is_active():
-                    await self.stop_task(task_id)
+                    await self._stop_task(task_id)
                 
                 # 从内存中删除任务
-                del self.tasks[task_id]
-                
-                # 停止任务监控（如果存在）
-                self._stop_task_monitor(task_id)
+                async with self._registry_lock:
+                    del self.tasks[task_id]
+                    self._by_status[task.status].discard(task_id)
+                    self.task_locks.pop(task_id, None)
                 
                 # 保存任务状态
                 await self._save_tasks_to_storage()
                 
                 # 删除任务数据（移到最后，确保即使文件删除失败也能成功删除内存中的任务）
-                await self.storage.delete(filename=f'{task_id}_results.jsonl')
+                await self._invalidate_results_cache(task_id)
+                await self.results_storage.delete(filename=f'{task_id}_results.jsonl')
                 
                 self.logger.info(f"删除任务成功: {task_id} - {task.config.name}")
                 return True
@@ -414,8 +712,7 @@ class TaskManager:
         Returns:
             Task: 任务对象或None
         """
-        async with self.task_lock:
-            return self.tasks.get(task_id)
+        return self.tasks.get(task_id)
     
     async def list_tasks(self, status: Optional[str] = None) -> List[Task]:
         """列出所有任务
@@ -424,11 +721,16 @@ class TaskManager:
         Returns:
             List[Task]: 任务列表
         """
-        async with self.task_lock:
-            if status:
-                return [task for task in self.tasks.values() if task.status == status]
-            else:
-                return list(self.tasks.values())
+        if status:
+            # 通过状态索引只访问匹配的任务
+            try:
+                task_ids = list(self._by_status[TaskStatus(status)])
+            except ValueError:
+                return []
+            return [self.tasks[i] for i in task_ids if i in self.tasks]
+        
+        # 先取快照，避免遍历期间其他协程增删任务
+        return list(self.tasks.values())
     
     async def get_task_metrics(self, task_id: str) -> Optional[Dict[str, Any]]:
         """获取任务指标
@@ -459,14 +761,16 @@ class TaskManager:
             if cached_results:
                 return cached_results
             
-            # 从存储获取结果
-            results = await self.storage.get(filename=f'{task_id}_results.jsonl')
-            if results and isinstance(results, list):
-                # 应用分页
-                paginated_results = results[offset:offset+limit]
-                
-                # 缓存结果
-                await self.cache.set(cache_key, paginated_results, ttl=60)
+            # 从存储流式读取所需的分页结果
+            paginated_results = [
+                item async for item in self.results_storage.iter_jsonl(
+                    f'{task_id}_results.jsonl', skip=offset, take=limit
+                )
+            ]
+            if paginated_results:
+                # 缓存结果（结果写入时主动失效，TTL仅作兜底）
+                await self.cache.set(cache_key, paginated_results)
+                self._results_cache_keys[task_id].add(cache_key)
                 
                 return paginated_results
             
@@ -475,11 +779,19 @@ class TaskManager:
             self.logger.error(f"获取任务结果失败: {str(e)}")
             return []
     
+    async def _invalidate_results_cache(self, task_id: str):
+        """清除任务的所有结果缓存
+        Args:
+            task_id: 任务ID
+        """
+        for cache_key in self._results_cache_keys.pop(task_id, ()):
+            await self.cache.delete(cache_key)
+    
     async def export_task_results(self, task_id: str, format: str = 'json', filepath: Optional[str] = None) -> str:
         """导出任务结果
         Args:
             task_id: 任务ID
-            format: 导出格式（json, csv, pickle）
+            format: 导出格式（json, jsonl, csv, pickle）
             filepath: 导出文件路径
         Returns:
             str: 导出文件路径
@@ -489,28 +801,31 @@ class TaskManager:
             if not task:
                 raise ValueError(f"任务不存在: {task_id}")
             
+            if format not in FileSystemStorage.SUPPORTED_FORMATS:
+                raise ValueError(f"不支持的导出格式: {format}")
+            
             # 获取所有结果
-            results = await self.storage.get(filename=f'{task_id}_results.jsonl')
+            results = await self.results_storage.get(filename=f'{task_id}_results.jsonl')
             if not results or not isinstance(results, list):
                 raise ValueError(f"任务没有结果: {task_id}")
             
             # 生成文件路径
             if not filepath:
-                export_dir = settings.get('export.path', 'exports')
-                os.makedirs(export_dir, exist_ok=True)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filepath = os.path.join(export_dir, f'{task_id}_export_{timestamp}.{format}')
-            
-            # 创建临时存储配置
-            export_config = {
-                'type': 'file',
-                'path': os.path.dirname(filepath),
-                'format': format
-            }
+                timestamp = time.strftime('%Y%m%d_%H%M%S')
+                filepath = os.path.join(self._export_dir, f'{task_id}_export_{timestamp}.{format}')
+            
+            # 默认导出目录只在首次导出时创建，其他目录每次导出时创建
+            export_dir = None
+            in_export_dir = os.path.dirname(os.path.abspath(filepath)) == os.path.abspath(self._export_dir)
+            if not in_export_dir:
+                export_dir = os.path.dirname(filepath)
+            elif not self._export_dir_created:
+                export_dir = self._export_dir
             
-            # 导出结果
-            export_storage = StorageManager.create_storage(export_config)
-            await export_storage.save(results, filename=os.path.basename(filepath), overwrite=True)
+            # 导出结果（文件写入在线程中执行，避免阻塞事件循环）
+            await asyncio.to_thread(self._export_sync, results, filepath, format, export_dir)
+            if in_export_dir:
+                self._export_dir_created = True
             
             self.logger.info(f"导出任务结果成功: {task_id} -> {filepath}")
             return filepath
@@ -518,67 +833,98 @@ class TaskManager:
             self.logger.error(f"导出任务结果失败: {str(e)}")
             raise
     
-    def _start_task_monitor(self, task_id: str):
-        """启动任务监控
+    def _export_sync(self, results: List[Dict[str, Any]], filepath: str, format: str,
+                     export_dir: Optional[str] = None):
+        """同步写入导出文件（在线程中直接调用文件存储的同步写入）
         Args:
-            task_id: 任务ID
+            results: 任务结果列表
+            filepath: 导出文件路径
+            format: 导出格式（json, jsonl, csv, pickle）
+            export_dir: 需要先创建的目录，None表示目录已存在
+        Raises:
+            OSError: 写入导出文件失败时抛出
         """
-        # 如果已经有监控在运行，先停止
-        self._stop_task_monitor(task_id)
-        
-        # 创建监控任务
-        async def monitor_task():
-            while task_id in self.tasks:
-                task = self.tasks[task_id]
-                if task.is_terminated():
-                    break
-                
-                # 记录任务状态
-                self.logger.debug(f"任务监控: {task_id} - 状态: {task.status}, 进度: {task.metrics.progress_percent:.2f}%")
-                
-                # 检查是否需要自动保存
-                await self._save_tasks_to_storage()
-                
-                # 等待一段时间
-                await asyncio.sleep(30)  # 每30秒检查一次
+        if export_dir:
+            os.makedirs(export_dir, exist_ok=True)
         
-        # 启动监控任务
-        self.task_monitors[task_id] = asyncio.create_task(monitor_task())
+        # 创建临时存储（目录已存在，不再重复检查）
+        export_storage = FileSystemStorage({
+            'path': os.path.dirname(filepath),
+            'format': format,
+            'create_dir': False
+        })
+        if not export_storage.save_sync(results, filename=os.path.basename(filepath), overwrite=True):
+            raise OSError(f"写入导出文件失败: {filepath}")
     
-    def _stop_task_monitor(self, task_id: str):
-        """停止任务监控
-        Args:
-            task_id: 任务ID
-        """
-        if task_id in self.task_monitors:
-            monitor = self.task_monitors[task_id]
-            if not monitor.done():
-                monitor.cancel()
-            del self.task_monitors[task_id]
+    def _ensure_monitor(self):
+        """启动全局任务监控（如果尚未运行）"""
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = self._spawn(self._global_monitor(), name='monitor')
+    
+    async def _global_monitor(self):
+        """全局任务监控，定期记录所有运行中任务的进度并保存任务状态"""
+        while True:
+            running_ids = list(self._by_status[TaskStatus.RUNNING])
+            if running_ids:
+                for task_id in running_ids:
+                    task = self.tasks.get(task_id)
+                    if task:
+                        # 记录任务状态
+                        self.logger.debug("任务监控: %s - 状态: %s, 进度: %.2f%%",
+                                          task_id, task.status, task.metrics.progress_percent)
+                
+                # 自动保存一次所有任务
+                await self._save_tasks_to_storage()
+            
+            # 等待一段时间
+            await asyncio.sleep(30)  # 每30秒检查一次
     
     async def shutdown(self):
         """关闭任务管理器"""
-        # 停止所有正在运行的任务
-        for task_id in list(self.tasks.keys()):
-            await self.stop_task(task_id)
+        # 并行停止所有未终止的任务，最后统一保存一次
+        async def stop_without_saving(task_id: str):
+            async with self.task_locks[task_id]:
+                await self._stop_task(task_id, persist=False)
+        
+        await asyncio.gather(
+            *(stop_without_saving(task_id) for task_id, task in list(self.tasks.items())
+              if not task.is_terminated()),
+            return_exceptions=True
+        )
         
-        # 停止所有任务监控
-        for task_id in list(self.task_monitors.keys()):
-            self._stop_task_monitor(task_id)
+        # 停止全局任务监控
+        if self._monitor_task and not self._monitor_task.done():
+            self._monitor_task.cancel()
         
-        # 保存任务状态
-        await self._save_tasks_to_storage()
+        # 等待仍在执行的后台任务（如进度写入）完成
+        if self._bg_tasks:
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
         
-        # 关闭线程池
-        self.executor.shutdown(wait=True)
+        # 保存任务状态（shield保证关闭过程被取消时写入仍能完成）
+        await asyncio.shield(self._save_tasks_to_storage())
         
         self.logger.info("任务管理器已关闭")
 
 
+# 全局任务管理器实例（首次使用时才创建，导入模块时不创建目录、存储和锁）
+_task_manager: Optional[TaskManager] = None
+
+
+def get_task_manager() -> TaskManager:
+    """获取全局任务管理器实例（单例模式）
+    Returns:
+        TaskManager: 任务管理器实例
+    """
+    global _task_manager
+    
+    if _task_manager is None:
+        _task_manager = TaskManager()
+        
+    return _task_manager
+
+
 # 使用示例
 if __name__ == '__main__':
-    # 只在直接运行该模块时创建实例
-    task_manager = TaskManager()
     # 示例任务配置
     task_config = {
         'name': '示例爬虫任务',
@@ -594,6 +940,7 @@ if __name__ == '__main__':
     # 测试任务管理器的异步函数
     async def test_task_manager():
         print("===== 测试任务管理器 =====")
+        task_manager = get_task_manager()
         
         # 创建任务
         print("创建任务...")
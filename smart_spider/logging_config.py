@@ -0,0 +1,92 @@
+"""
+SmartSpider 日志配置
+
+应用入口（main、main_api）启动时调用一次setup_logging，用logging.config.dictConfig
+按设置项配置整个smart_spider日志树；包内模块直接使用logging.getLogger(__name__)，
+获取日志记录器只是一次字典查找。
+
+导入本包不会配置日志：未调用setup_logging时，包内的记录按标准库的规则传播给宿主程序的处理器。
+
+注意：dictConfig会关闭此前创建的所有处理器，因此只在启动时执行一次，之后的调用直接返回。
+"""
+
+import logging.config
+import threading
+from typing import Any, Dict, Optional
+
+_setup_done = False
+_setup_lock = threading.Lock()
+
+
+def build_logging_config(log_level: str = "INFO", log_file: Optional[str] = None,
+                         with_console: Optional[bool] = None) -> Dict[str, Any]:
+    """构建dictConfig使用的日志配置
+    
+    Args:
+        log_level: 日志级别
+        log_file: 日志文件路径，为None时只输出到控制台
+        with_console: 是否输出到控制台，为None时在没有日志文件或stderr连接终端时输出
+        
+    Returns:
+        Dict[str, Any]: 日志配置字典
+    """
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            # 日志记录器只挂QueueHandler；控制台和缓冲文件处理器由工厂函数挂到后台监听器上
+            'queue': {
+                '()': 'smart_spider.utils.logger.make_queue_handler',
+                'logger_name': 'smart_spider',
+                'log_file': log_file,
+                'with_console': with_console,
+            },
+        },
+        'loggers': {
+            'smart_spider': {
+                'handlers': ['queue'],
+                'level': log_level.upper(),
+                # 既不写文件也不输出到控制台时交给上级处理器，避免记录被丢弃
+                'propagate': not log_file and with_console is False,
+            },
+        },
+    }
+
+
+def build_logging_config_from_settings(settings) -> Dict[str, Any]:
+    """根据设置项构建日志配置
+    
+    使用logging.level、logging.file和logging.console.enabled；LOG_LEVEL/LOG_FILE环境变量
+    已由Settings合并到这些设置项中。logging.file可以是文件路径，也可以是包含enabled/path的字典。
+    
+    Args:
+        settings: Settings实例
+        
+    Returns:
+        Dict[str, Any]: 日志配置字典
+    """
+    log_file = settings.get('logging.file')
+    if isinstance(log_file, dict):
+        log_file = log_file.get('path') if log_file.get('enabled', True) else None
+    console = settings.get('logging.console')
+    with_console = console.get('enabled') if isinstance(console, dict) else None
+    return build_logging_config(
+        log_level=settings.get('logging.level') or "INFO",
+        log_file=log_file or None,
+        with_console=with_console
+    )
+
+
+def setup_logging(config: Optional[Dict[str, Any]] = None) -> None:
+    """配置日志（只在首次调用时生效）
+    
+    Args:
+        config: dictConfig格式的日志配置，为None时使用build_logging_config()的默认配置
+    """
+    global _setup_done
+    if _setup_done:
+        return
+    with _setup_lock:
+        if not _setup_done:
+            logging.config.dictConfig(config if config is not None else build_logging_config())
+            _setup_done = True
@@ -4,11 +4,16 @@ SmartSpider 主入口点
 
 import sys
 from smart_spider.core.crawler import SmartCrawler
+from smart_spider.logging_config import build_logging_config_from_settings, setup_logging
 from smart_spider.settings import settings
+from smart_spider.utils.logger import disable_record_metadata
 
 
 def main():
     """运行 SmartSpider 的主函数"""
+    # 按设置项配置日志；日志格式不使用调用位置、线程和进程信息，关闭其采集
+    setup_logging(build_logging_config_from_settings(settings))
+    disable_record_metadata()
     try:
         # 获取版本号（从配置中或硬编码）
         version = settings.get('app', {}).get('version', '0.1.0')
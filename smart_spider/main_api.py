@@ -2,22 +2,44 @@
 SmartSpider API 服务入口点
 """
 
+import logging
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from smart_spider.api.routes import router
 from smart_spider.api.proxy_routes import router as proxy_router
+from smart_spider.logging_config import build_logging_config_from_settings, setup_logging
 from smart_spider.settings import settings
-from smart_spider.utils.logger import get_logger
+from smart_spider.utils.logger import disable_record_metadata
 
 # 初始化日志记录器
-logger = get_logger(__name__)
+logger = logging.getLogger(__name__)
+
+
+def _configure_logging():
+    """按设置项配置日志；日志格式不使用调用位置、线程和进程信息，关闭其采集
+    
+    只在服务启动时调用，导入本模块不修改宿主程序的日志配置
+    """
+    setup_logging(build_logging_config_from_settings(settings))
+    disable_record_metadata()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """服务启动时配置日志（uvicorn重载模式下的工作进程也在这里配置）"""
+    _configure_logging()
+    yield
+
 
 # 创建FastAPI应用
 app = FastAPI(
     title="SmartSpider API",
     description="智能网络爬虫系统的REST API",
     version=settings.get("app.version", "0.1.0"),
+    lifespan=lifespan,
 )
 
 # 配置CORS中间件
@@ -47,6 +69,7 @@ def root():
 
 def run_api():
     """运行FastAPI服务"""
+    _configure_logging()
     logger.info(f"Starting SmartSpider API v{app.version}")
     logger.info(f"Documentation available at http://localhost:8000/docs")
     uvicorn.run(
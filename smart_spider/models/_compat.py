@@ -0,0 +1,43 @@
+"""
+数据模型共用的兼容性定义和默认值工厂
+"""
+
+import sys
+import uuid
+from datetime import datetime, timezone
+
+# Python 3.10+ 的dataclass支持slots，实例不再携带__dict__
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+class _IndexedList(list):
+    """记录修改的列表：任何增删改都会置位dirty，所属对象在下次查找前据此重建索引"""
+
+    dirty = False
+
+
+def _marks_dirty(name: str):
+    """包装list的修改方法，调用前置位dirty"""
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self.dirty = True
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend',
+              'insert', 'pop', 'remove', 'clear', 'sort', 'reverse'):
+    setattr(_IndexedList, _name, _marks_dirty(_name))
+
+
+def _new_id() -> str:
+    """生成随机ID（UUID4字符串，与API中按UUID4校验的ID参数兼容）"""
+    return str(uuid.uuid4())
+
+
+def _utcnow() -> datetime:
+    """当前UTC时间，作为datetime字段的默认值工厂"""
+    return datetime.now(timezone.utc)
@@ -2,11 +2,40 @@
 Cookie 类 - Cookie管理模型定义
 """
 
-import uuid
+import time
+import random
 from enum import Enum
+from collections import Counter
 from datetime import datetime, timezone, timedelta
-from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Union, Tuple
+
+from smart_spider.models._compat import _SLOTS, _IndexedList, _new_id, _utcnow
+
+# 热路径上直接比较POSIX时间戳，避免每次构造带时区的datetime对象
+_now_ts = time.time
+_choice = random.choice
+
+
+def _to_ts(value: Union[datetime, str, float, None]) -> float:
+    """将datetime/ISO字符串/时间戳统一转换为POSIX时间戳，空值返回0.0"""
+    if not value:
+        return 0.0
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _from_ts(ts: float) -> Optional[datetime]:
+    """将POSIX时间戳转换为UTC datetime，0.0返回None"""
+    return datetime.fromtimestamp(ts, timezone.utc) if ts else None
+
+
+def _iso(ts: float) -> Optional[str]:
+    """将POSIX时间戳格式化为ISO字符串，0.0返回None"""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
 
 
 class CookieStatus(str, Enum):
@@ -41,102 +70,217 @@ class LeaseStatus(str, Enum):
     EXPIRED = "expired"    # 已过期
 
 
-@dataclass
+# CookieItem.from_dict的枚举字段转换表
+_COOKIE_ENUM_FIELDS = (  # (字典键, 枚举类型)
+    ('status', CookieStatus),
+    ('source', CookieSource),
+)
+
+
+@dataclass(init=False, **_SLOTS)
 class CookieItem:
-    """Cookie项数据类"""
+    """Cookie项数据类
+
+    过期时间、更新时间和最后使用时间在内部以POSIX时间戳（float）存储；
+    构造参数及 expires/updated_at/last_used_at 属性仍使用datetime，与旧接口一致。
+    """
     domain: str  # 域名
     name: str    # Cookie名称
     value: str   # Cookie值
-    path: str = "/"  # 路径
-    expires: Optional[datetime] = None  # 过期时间
-    secure: bool = False  # 是否安全
-    http_only: bool = False  # 是否HttpOnly
-    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))  # 创建时间
-    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))  # 更新时间
-    status: CookieStatus = CookieStatus.VALID  # Cookie状态
-    source: CookieSource = CookieSource.SELF_GENERATED  # Cookie来源
-    user_agent: Optional[str] = None  # 关联的User-Agent
-    usage_count: int = 0  # 使用次数
-    last_used_at: Optional[datetime] = None  # 最后使用时间
+    path: str  # 路径
+    expires_ts: float  # 过期时间戳（0表示会话Cookie，不过期）
+    secure: bool  # 是否安全
+    http_only: bool  # 是否HttpOnly
+    created_at: datetime  # 创建时间
+    updated_ts: float  # 更新时间戳
+    status: CookieStatus  # Cookie状态
+    source: CookieSource  # Cookie来源
+    user_agent: Optional[str]  # 关联的User-Agent
+    usage_count: int  # 使用次数
+    last_used_ts: float  # 最后使用时间戳（0表示从未使用）
+    id: str  # Cookie ID
+
+    def __init__(self, domain: str, name: str, value: str, path: str = "/",
+                 expires: Optional[datetime] = None, secure: bool = False, http_only: bool = False,
+                 created_at: Optional[datetime] = None, updated_at: Optional[datetime] = None,
+                 status: CookieStatus = CookieStatus.VALID,
+                 source: CookieSource = CookieSource.SELF_GENERATED,
+                 user_agent: Optional[str] = None, usage_count: int = 0,
+                 last_used_at: Optional[datetime] = None, id: Optional[str] = None):
+        self.domain = domain
+        self.name = name
+        self.value = value
+        self.path = path
+        self.expires_ts = _to_ts(expires)
+        self.secure = secure
+        self.http_only = http_only
+        self.created_at = created_at if created_at is not None else _utcnow()
+        self.updated_ts = _to_ts(updated_at) if updated_at is not None else _now_ts()
+        self.status = status
+        self.source = source
+        self.user_agent = user_agent
+        self.usage_count = usage_count
+        self.last_used_ts = _to_ts(last_used_at)
+        self.id = id if id is not None else _new_id()
+
+    @property
+    def expires(self) -> Optional[datetime]:
+        """过期时间"""
+        return _from_ts(self.expires_ts)
+
+    @expires.setter
+    def expires(self, value: Union[datetime, str, float, None]) -> None:
+        self.expires_ts = _to_ts(value)
+
+    @property
+    def updated_at(self) -> datetime:
+        """更新时间"""
+        return _from_ts(self.updated_ts)
+
+    @updated_at.setter
+    def updated_at(self, value: Union[datetime, str, float]) -> None:
+        self.updated_ts = _to_ts(value)
+
+    @property
+    def last_used_at(self) -> Optional[datetime]:
+        """最后使用时间"""
+        return _from_ts(self.last_used_ts)
+
+    @last_used_at.setter
+    def last_used_at(self, value: Union[datetime, str, float, None]) -> None:
+        self.last_used_ts = _to_ts(value)
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
-        result = asdict(self)
-        # 转换datetime为字符串
-        result['created_at'] = self.created_at.isoformat()
-        result['updated_at'] = self.updated_at.isoformat()
-        if self.expires:
-            result['expires'] = self.expires.isoformat()
-        if self.last_used_at:
-            result['last_used_at'] = self.last_used_at.isoformat()
-        # 转换枚举为字符串
-        result['status'] = self.status.value
-        result['source'] = self.source.value
-        return result
+        # 时间戳字段在边界处转换为ISO字符串，保持原有的字段名
+        return {
+            'domain': self.domain,
+            'name': self.name,
+            'value': self.value,
+            'path': self.path,
+            'expires': _iso(self.expires_ts),
+            'secure': self.secure,
+            'http_only': self.http_only,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': _iso(self.updated_ts),
+            'status': self.status.value,
+            'source': self.source.value,
+            'user_agent': self.user_agent,
+            'usage_count': self.usage_count,
+            'last_used_at': _iso(self.last_used_ts),
+            'id': self.id
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'CookieItem':
         """从字典创建实例"""
         # 处理datetime类型
-        if 'created_at' in data and isinstance(data['created_at'], str):
-            data['created_at'] = datetime.fromisoformat(data['created_at'])
-        if 'updated_at' in data and isinstance(data['updated_at'], str):
-            data['updated_at'] = datetime.fromisoformat(data['updated_at'])
-        if 'expires' in data and isinstance(data['expires'], str):
-            data['expires'] = datetime.fromisoformat(data['expires'])
-        if 'last_used_at' in data and isinstance(data['last_used_at'], str):
-            data['last_used_at'] = datetime.fromisoformat(data['last_used_at'])
+        created_at = data.get('created_at')
+        if isinstance(created_at, str):
+            data['created_at'] = datetime.fromisoformat(created_at)
+        # expires/updated_at/last_used_at 的ISO字符串由构造函数直接转换为时间戳
         # 处理枚举类型
-        if 'status' in data and isinstance(data['status'], str):
-            data['status'] = CookieStatus(data['status'])
-        if 'source' in data and isinstance(data['source'], str):
-            data['source'] = CookieSource(data['source'])
+        for key, enum_cls in _COOKIE_ENUM_FIELDS:
+            value = data.get(key)
+            if isinstance(value, str):
+                data[key] = enum_cls(value)
         return cls(**data)
 
-    def is_expired(self) -> bool:
-        """检查Cookie是否过期"""
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """检查Cookie是否过期
+        Args:
+            now: 当前时间戳，批量检查时由调用方传入以避免重复取时
+        Returns:
+            bool: 是否过期
+        """
         if self.status == CookieStatus.EXPIRED:
             return True
-        if self.expires and datetime.now(timezone.utc) > self.expires:
+        if self.expires_ts and (now or _now_ts()) > self.expires_ts:
             self.status = CookieStatus.EXPIRED
             return True
         return False
 
-    def is_valid(self) -> bool:
-        """检查Cookie是否有效"""
-        return self.status == CookieStatus.VALID and not self.is_expired()
+    def is_valid(self, now: Optional[float] = None) -> bool:
+        """检查Cookie是否有效
+        Args:
+            now: 当前时间戳，批量检查时由调用方传入以避免重复取时
+        Returns:
+            bool: 是否有效
+        """
+        return self.status == CookieStatus.VALID and not self.is_expired(now)
 
     def use(self) -> None:
         """标记Cookie为使用中并更新使用统计"""
         self.status = CookieStatus.IN_USE
         self.usage_count += 1
-        self.last_used_at = datetime.now(timezone.utc)
-        self.updated_at = datetime.now(timezone.utc)
+        self.last_used_ts = self.updated_ts = _now_ts()
 
     def release(self, is_valid: bool = True) -> None:
         """释放Cookie并更新状态"""
         self.status = CookieStatus.VALID if is_valid else CookieStatus.INVALID
-        self.updated_at = datetime.now(timezone.utc)
+        self.updated_ts = _now_ts()
 
     def block(self, reason: Optional[str] = None) -> None:
         """阻塞Cookie"""
         self.status = CookieStatus.BLOCKED
-        self.updated_at = datetime.now(timezone.utc)
+        self.updated_ts = _now_ts()
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class CookiePool:
     """Cookie池数据类"""
     name: str  # Cookie池名称
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))  # Cookie池ID
+    id: str = field(default_factory=_new_id)  # Cookie池ID
     type: CookiePoolType = CookiePoolType.COMMON  # Cookie池类型
     domain: Optional[str] = None  # 关联域名（如果是域名专用池）
     cookies: List[CookieItem] = field(default_factory=list)  # Cookie列表
     rotation_strategy: str = "round_robin"  # 轮换策略
     min_valid_count: int = 5  # 最小有效Cookie数量
-    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))  # 创建时间
-    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))  # 更新时间
+    created_at: datetime = field(default_factory=_utcnow)  # 创建时间
+    updated_at: datetime = field(default_factory=_utcnow)  # 更新时间
     description: Optional[str] = None  # 描述
+    # 索引：(domain, name, path) -> 下标，domain -> 下标列表
+    _by_key: Dict[Tuple[str, str, str], int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _by_domain: Dict[str, List[int]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _by_id: Dict[str, CookieItem] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        """根据cookies列表重建索引"""
+        by_key = {}
+        by_domain = {}
+        by_id = {}
+        for i, cookie in enumerate(self.cookies):
+            by_key[(cookie.domain, cookie.name, cookie.path)] = i
+            by_domain.setdefault(cookie.domain, []).append(i)
+            by_id[cookie.id] = cookie
+        self._by_key = by_key
+        self._by_domain = by_domain
+        self._by_id = by_id
+        # 改用记录修改的列表，外部对cookies的任何增删改都会在下次查找前触发重建
+        if type(self.cookies) is not _IndexedList:
+            self.cookies = _IndexedList(self.cookies)
+        self.cookies.dirty = False
+
+    def _ensure_index(self) -> None:
+        """cookies列表被整体替换或在外部修改过时重建索引"""
+        cookies = self.cookies
+        if type(cookies) is not _IndexedList or cookies.dirty:
+            self._rebuild_index()
+
+    @property
+    def cookies_by_id(self) -> Dict[str, CookieItem]:
+        """按ID索引的Cookie字典"""
+        self._ensure_index()
+        return self._by_id
+
+    def get_domain_cookies(self, domain: str) -> List[CookieItem]:
+        """获取特定域名下的所有Cookie"""
+        self._ensure_index()
+        cookies = self.cookies
+        return [cookies[i] for i in self._by_domain.get(domain, ())]
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -172,44 +316,89 @@ class CookiePool:
 
     def add_cookie(self, cookie: CookieItem) -> None:
         """添加Cookie到池中"""
-        # 检查是否已存在相同的Cookie
-        for i, existing_cookie in enumerate(self.cookies):
-            if (existing_cookie.domain == cookie.domain and 
-                existing_cookie.name == cookie.name and 
-                existing_cookie.path == cookie.path):
-                # 替换现有Cookie
-                self.cookies[i] = cookie
-                self.updated_at = datetime.now(timezone.utc)
-                return
-        # 添加新Cookie
-        self.cookies.append(cookie)
+        self._ensure_index()
+        key = (cookie.domain, cookie.name, cookie.path)
+        index = self._by_key.get(key)
+        if index is not None:
+            # 替换现有Cookie
+            del self._by_id[self.cookies[index].id]
+            self.cookies[index] = cookie
+        else:
+            # 添加新Cookie
+            index = len(self.cookies)
+            self.cookies.append(cookie)
+            self._by_key[key] = index
+            self._by_domain.setdefault(cookie.domain, []).append(index)
+        self._by_id[cookie.id] = cookie
+        # 索引已同步更新
+        self.cookies.dirty = False
         self.updated_at = datetime.now(timezone.utc)
 
     def remove_cookie(self, cookie_name: str, domain: str, path: str = "/") -> bool:
         """从池中移除Cookie"""
-        original_length = len(self.cookies)
-        self.cookies = [
-            cookie for cookie in self.cookies
-            if not (cookie.name == cookie_name and cookie.domain == domain and cookie.path == path)
-        ]
-        if len(self.cookies) < original_length:
-            self.updated_at = datetime.now(timezone.utc)
-            return True
-        return False
+        self._ensure_index()
+        index = self._by_key.get((domain, cookie_name, path))
+        if index is None:
+            return False
+        self._remove_at(index)
+        return True
+
+    def remove_cookie_by_id(self, cookie_id: str) -> bool:
+        """按ID从池中移除Cookie"""
+        self._ensure_index()
+        cookie = self._by_id.get(cookie_id)
+        if cookie is None:
+            return False
+        cookies = self.cookies
+        index = self._by_key.get((cookie.domain, cookie.name, cookie.path))
+        if index is None or cookies[index] is not cookie:
+            # 与其他Cookie的(domain, name, path)重复时，按对象在列表中的位置查找
+            index = next(i for i, c in enumerate(cookies) if c is cookie)
+        self._remove_at(index)
+        return True
+
+    def reindex(self) -> None:
+        """Cookie的domain/name/path在池外被修改后调用，下次查找前重建索引"""
+        if type(self.cookies) is _IndexedList:
+            self.cookies.dirty = True
+
+    def _remove_at(self, index: int) -> None:
+        """移除指定位置的Cookie并增量更新索引（调用方需保证索引是最新的）"""
+        # 用末尾元素填补空位，避免整体移动列表
+        cookies = self.cookies
+        cookie = cookies[index]
+        key = (cookie.domain, cookie.name, cookie.path)
+        if self._by_key.get(key) == index:
+            del self._by_key[key]
+        self._by_id.pop(cookie.id, None)
+        domain_indexes = self._by_domain[cookie.domain]
+        domain_indexes.remove(index)
+        if not domain_indexes:
+            del self._by_domain[cookie.domain]
+        last_index = len(cookies) - 1
+        last = cookies.pop()
+        if index != last_index:
+            cookies[index] = last
+            last_key = (last.domain, last.name, last.path)
+            if self._by_key.get(last_key) == last_index:
+                self._by_key[last_key] = index
+            last_domain_indexes = self._by_domain[last.domain]
+            last_domain_indexes[last_domain_indexes.index(last_index)] = index
+        # 索引已同步更新
+        cookies.dirty = False
+        self.updated_at = datetime.now(timezone.utc)
 
     def get_valid_cookies(self) -> List[CookieItem]:
         """获取所有有效Cookie"""
-        valid_cookies = []
-        for cookie in self.cookies:
-            if cookie.is_valid():
-                valid_cookies.append(cookie)
-        return valid_cookies
+        now = _now_ts()
+        return [cookie for cookie in self.cookies if cookie.is_valid(now)]
 
     def get_cookie_for_domain(self, domain: str) -> Optional[CookieItem]:
         """获取特定域名的一个有效Cookie"""
+        now = _now_ts()
         domain_cookies = [
-            cookie for cookie in self.cookies
-            if cookie.domain == domain and cookie.is_valid()
+            cookie for cookie in self.get_domain_cookies(domain)
+            if cookie.is_valid(now)
         ]
         
         if not domain_cookies:
@@ -221,104 +410,192 @@ class CookiePool:
             return min(domain_cookies, key=lambda c: c.usage_count)
         elif self.rotation_strategy == "random":
             # 随机选择
-            import random
-            return random.choice(domain_cookies)
+            return _choice(domain_cookies)
         elif self.rotation_strategy == "least_recent":
             # 选择最后使用时间最早的Cookie
-            return min(domain_cookies, key=lambda c: c.last_used_at or datetime.min.replace(tzinfo=timezone.utc))
+            return min(domain_cookies, key=lambda c: c.last_used_ts)
         else:
             # 默认使用轮询策略
             return min(domain_cookies, key=lambda c: c.usage_count)
 
     def get_cookies_dict(self, domain: str) -> Dict[str, str]:
         """获取特定域名的所有有效Cookie字典（名称:值）"""
-        cookies_dict = {}
-        for cookie in self.cookies:
-            if cookie.domain == domain and cookie.is_valid():
-                cookies_dict[cookie.name] = cookie.value
-        return cookies_dict
+        self._ensure_index()
+        cookies = self.cookies
+        now = _now_ts()
+        valid = CookieStatus.VALID
+        # 只遍历该域名的Cookie，内联有效性判断（不修改状态，过期标记由refresh_cookies负责）
+        return {
+            cookie.name: cookie.value
+            for cookie in (cookies[i] for i in self._by_domain.get(domain, ()))
+            if cookie.status == valid and not (cookie.expires_ts and now > cookie.expires_ts)
+        }
 
     def mark_cookie_invalid(self, cookie_name: str, domain: str) -> bool:
         """标记Cookie为无效"""
-        for cookie in self.cookies:
-            if cookie.domain == domain and cookie.name == cookie_name:
+        for cookie in self.get_domain_cookies(domain):
+            if cookie.name == cookie_name:
                 cookie.status = CookieStatus.INVALID
-                cookie.updated_at = datetime.now(timezone.utc)
+                cookie.updated_ts = _now_ts()
                 self.updated_at = datetime.now(timezone.utc)
                 return True
         return False
 
     def refresh_cookies(self) -> int:
         """刷新Cookie状态，检查过期情况"""
+        # 单次取时，整个池只做一遍浮点比较；过期判断内联展开，省去每个Cookie的方法调用
+        now = _now_ts()
+        expired = CookieStatus.EXPIRED
         expired_count = 0
         for cookie in self.cookies:
-            if cookie.is_expired():
+            if cookie.status == expired:
+                expired_count += 1
+            elif cookie.expires_ts and cookie.expires_ts < now:
+                cookie.status = expired
                 expired_count += 1
         if expired_count > 0:
             self.updated_at = datetime.now(timezone.utc)
         return expired_count
 
+    def refresh_and_stats(self) -> Tuple[int, Dict[str, int]]:
+        """刷新Cookie状态并获取统计信息，一次遍历完成
+        Returns:
+            Tuple[int, Dict[str, int]]: 过期Cookie数量和Cookie池统计信息
+        """
+        now = _now_ts()
+        expired = CookieStatus.EXPIRED
+        counts = Counter()
+        for cookie in self.cookies:
+            if cookie.status != expired and cookie.expires_ts and cookie.expires_ts < now:
+                cookie.status = expired
+            counts[cookie.status] += 1
+        expired_count = counts[expired]
+        if expired_count > 0:
+            self.updated_at = datetime.now(timezone.utc)
+        return expired_count, self._stats_from_counts(counts)
+
     def get_stats(self) -> Dict[str, int]:
         """获取Cookie池统计信息"""
-        stats = {
+        return self._stats_from_counts(Counter(cookie.status for cookie in self.cookies))
+
+    def _stats_from_counts(self, counts: Counter) -> Dict[str, int]:
+        """根据状态计数生成统计信息"""
+        return {
             'total': len(self.cookies),
-            'valid': 0,
-            'expired': 0,
-            'invalid': 0,
-            'blocked': 0,
-            'in_use': 0
+            'valid': counts[CookieStatus.VALID],
+            'expired': counts[CookieStatus.EXPIRED],
+            'invalid': counts[CookieStatus.INVALID],
+            'blocked': counts[CookieStatus.BLOCKED],
+            'in_use': counts[CookieStatus.IN_USE]
         }
-        
+
+    def count_valid(self, limit: Optional[int] = None) -> int:
+        """统计有效Cookie数量
+        Args:
+            limit: 计数达到该值即提前返回，默认为min_valid_count；传入0表示完整统计
+        Returns:
+            int: 有效Cookie数量（提前返回时为limit）
+        """
+        if limit is None:
+            limit = self.min_valid_count
+        now = _now_ts()
+        count = 0
         for cookie in self.cookies:
-            if cookie.status in stats:
-                stats[cookie.status.value] += 1
-        
-        return stats
+            if cookie.is_valid(now):
+                count += 1
+                if count == limit:
+                    break
+        return count
 
     def is_healthy(self) -> bool:
         """检查Cookie池是否健康"""
-        valid_count = len(self.get_valid_cookies())
-        return valid_count >= self.min_valid_count
+        return self.count_valid() >= self.min_valid_count
 
 
-@dataclass
+@dataclass(init=False, **_SLOTS)
 class CookieLease:
-    """Cookie租用记录数据类"""
+    """Cookie租用记录数据类
+
+    租用时间和过期时间在内部以POSIX时间戳（float）存储；
+    构造参数及 leased_at/expires_at 属性仍使用datetime，与旧接口一致。
+    """
     pool_id: str  # Cookie池ID
     cookie_name: str  # Cookie名称
     domain: str  # 域名
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))  # 租用ID
-    leased_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))  # 租用时间
-    expires_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc) + timedelta(hours=1))  # 租用过期时间
-    task_id: Optional[str] = None  # 关联任务ID
-    released_at: Optional[datetime] = None  # 释放时间
-    is_active: bool = True  # 是否活跃
+    id: str  # 租用ID
+    leased_ts: float  # 租用时间戳
+    expires_ts: float  # 租用过期时间戳
+    task_id: Optional[str]  # 关联任务ID
+    released_at: Optional[datetime]  # 释放时间
+    is_active: bool  # 是否活跃
+    cookie_id: Optional[str]  # 租用的Cookie ID
+
+    def __init__(self, pool_id: str, cookie_name: str, domain: str, id: Optional[str] = None,
+                 leased_at: Optional[datetime] = None, expires_at: Optional[datetime] = None,
+                 task_id: Optional[str] = None, released_at: Optional[datetime] = None,
+                 is_active: bool = True, cookie_id: Optional[str] = None):
+        self.pool_id = pool_id
+        self.cookie_name = cookie_name
+        self.domain = domain
+        self.id = id if id is not None else _new_id()
+        self.leased_ts = _to_ts(leased_at) if leased_at is not None else _now_ts()
+        # 默认租用1小时
+        self.expires_ts = _to_ts(expires_at) if expires_at is not None else self.leased_ts + 3600
+        self.task_id = task_id
+        self.released_at = released_at
+        self.is_active = is_active
+        self.cookie_id = cookie_id
+
+    @property
+    def status(self) -> LeaseStatus:
+        """租用状态：释放前为ACTIVE，释放后为RELEASED"""
+        return LeaseStatus.ACTIVE if self.is_active else LeaseStatus.RELEASED
+
+    @property
+    def leased_at(self) -> datetime:
+        """租用时间"""
+        return _from_ts(self.leased_ts)
+
+    @leased_at.setter
+    def leased_at(self, value: Union[datetime, str, float]) -> None:
+        self.leased_ts = _to_ts(value)
+
+    @property
+    def expires_at(self) -> datetime:
+        """租用过期时间"""
+        return _from_ts(self.expires_ts)
+
+    @expires_at.setter
+    def expires_at(self, value: Union[datetime, str, float]) -> None:
+        self.expires_ts = _to_ts(value)
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
-        result = asdict(self)
-        # 转换datetime为字符串
-        result['leased_at'] = self.leased_at.isoformat()
-        result['expires_at'] = self.expires_at.isoformat()
-        if self.released_at:
-            result['released_at'] = self.released_at.isoformat()
-        return result
+        # 时间戳字段在边界处转换为ISO字符串，保持原有的字段名
+        return {
+            'pool_id': self.pool_id,
+            'cookie_name': self.cookie_name,
+            'domain': self.domain,
+            'id': self.id,
+            'leased_at': _iso(self.leased_ts),
+            'expires_at': _iso(self.expires_ts),
+            'task_id': self.task_id,
+            'released_at': self.released_at.isoformat() if self.released_at else None,
+            'is_active': self.is_active,
+            'cookie_id': self.cookie_id
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'CookieLease':
         """从字典创建实例"""
-        # 处理datetime类型
-        if 'leased_at' in data and isinstance(data['leased_at'], str):
-            data['leased_at'] = datetime.fromisoformat(data['leased_at'])
-        if 'expires_at' in data and isinstance(data['expires_at'], str):
-            data['expires_at'] = datetime.fromisoformat(data['expires_at'])
+        # leased_at/expires_at 的ISO字符串由构造函数直接转换为时间戳
         if 'released_at' in data and isinstance(data['released_at'], str):
             data['released_at'] = datetime.fromisoformat(data['released_at'])
         return cls(**data)
 
     def is_expired(self) -> bool:
         """检查租用是否过期"""
-        return datetime.now(timezone.utc) > self.expires_at or not self.is_active
+        return not self.is_active or _now_ts() > self.expires_ts
 
     def release(self) -> None:
         """释放租用"""
@@ -389,12 +666,9 @@ if __name__ == '__main__':
     )
     cookie_pool.add_cookie(expired_cookie)
     
-    # 刷新Cookie状态
-    expired_count = cookie_pool.refresh_cookies()
+    # 刷新Cookie状态并获取更新后的统计
+    expired_count, stats = cookie_pool.refresh_and_stats()
     print(f"过期Cookie数量: {expired_count}")
-    
-    # 更新后的统计
-    stats = cookie_pool.get_stats()
     print(f"更新后Cookie池统计: {stats}")
     
     # 转换为字典
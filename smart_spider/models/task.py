@@ -2,12 +2,13 @@
 Task 类 - 任务模型定义
 """
 
-import uuid
 from enum import Enum
 from datetime import datetime, timezone
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional
 
+from smart_spider.models._compat import _SLOTS, _new_id, _utcnow
+
 
 class TaskStatus(str, Enum):
     """任务状态枚举"""
@@ -26,7 +27,7 @@ class TaskPriority(str, Enum):
     HIGH = "high"
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TaskConfig:
     """任务配置数据类"""
     name: str  # 任务名称
@@ -45,8 +46,23 @@ class TaskConfig:
     custom_headers: Optional[Dict[str, str]] = None  # 自定义请求头
 
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典格式"""
-        return asdict(self)
+        """转换为字典格式（直接列出字段，不做asdict的递归深拷贝，嵌套的列表和字典与实例共享）"""
+        return {
+            'name': self.name,
+            'entry_urls': self.entry_urls,
+            'concurrency': self.concurrency,
+            'delay': self.delay,
+            'timeout': self.timeout,
+            'retry_count': self.retry_count,
+            'allowed_domains': self.allowed_domains,
+            'follow_external_links': self.follow_external_links,
+            'user_agent': self.user_agent,
+            'pagination': self.pagination,
+            'selectors': self.selectors,
+            'cookie_pool_id': self.cookie_pool_id,
+            'storage_config': self.storage_config,
+            'custom_headers': self.custom_headers
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'TaskConfig':
@@ -54,7 +70,7 @@ class TaskConfig:
         return cls(**data)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TaskMetrics:
     """任务指标数据类"""
     success_count: int = 0  # 成功爬取的URL数量
@@ -64,20 +80,40 @@ class TaskMetrics:
     start_time: Optional[datetime] = None  # 开始时间
     end_time: Optional[datetime] = None  # 结束时间
     duration: Optional[float] = None  # 持续时间（秒）
-    crawled_urls: set = field(default_factory=set)  # 已爬取的URL集合
-    error_urls: set = field(default_factory=set)  # 爬取失败的URL集合
+    crawled_urls: set = field(default_factory=set)  # 已爬取的URL集合（最多保留max_url_retention条）
+    error_urls: set = field(default_factory=set)  # 爬取失败的URL集合（最多保留max_url_retention条）
+    crawled_total: int = 0  # 累计记录的已爬取URL数量
+    error_total: int = 0  # 累计记录的失败URL数量
+    max_url_retention: int = 10_000  # 每个URL集合最多保留的条数，防止长时间运行的任务内存无限增长
+
+    def add_crawled_url(self, url: str) -> None:
+        """记录一个已爬取的URL，超过保留上限时只计数"""
+        self.crawled_total += 1
+        if len(self.crawled_urls) < self.max_url_retention:
+            self.crawled_urls.add(url)
+
+    def add_error_url(self, url: str) -> None:
+        """记录一个爬取失败的URL，超过保留上限时只计数"""
+        self.error_total += 1
+        if len(self.error_urls) < self.max_url_retention:
+            self.error_urls.add(url)
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
-        result = asdict(self)
-        # 转换集合为列表，转换datetime为字符串
-        result['crawled_urls'] = list(self.crawled_urls)
-        result['error_urls'] = list(self.error_urls)
-        if self.start_time:
-            result['start_time'] = self.start_time.isoformat()
-        if self.end_time:
-            result['end_time'] = self.end_time.isoformat()
-        return result
+        return {
+            'success_count': self.success_count,
+            'fail_count': self.fail_count,
+            'total_count': self.total_count,
+            'progress_percent': self.progress_percent,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'duration': self.duration,
+            'crawled_urls': list(self.crawled_urls),
+            'error_urls': list(self.error_urls),
+            'crawled_total': self.crawled_total,
+            'error_total': self.error_total,
+            'max_url_retention': self.max_url_retention
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'TaskMetrics':
@@ -87,6 +123,9 @@ class TaskMetrics:
             data['crawled_urls'] = set(data['crawled_urls'])
         if 'error_urls' in data and isinstance(data['error_urls'], list):
             data['error_urls'] = set(data['error_urls'])
+        # 兼容没有累计计数的旧数据
+        data.setdefault('crawled_total', len(data.get('crawled_urls', ())))
+        data.setdefault('error_total', len(data.get('error_urls', ())))
         if 'start_time' in data and isinstance(data['start_time'], str):
             data['start_time'] = datetime.fromisoformat(data['start_time'])
         if 'end_time' in data and isinstance(data['end_time'], str):
@@ -94,16 +133,16 @@ class TaskMetrics:
         return cls(**data)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Task:
     """爬虫任务数据类"""
     config: TaskConfig  # 任务配置
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))  # 任务ID
+    id: str = field(default_factory=_new_id)  # 任务ID
     status: TaskStatus = TaskStatus.PENDING  # 任务状态
     priority: TaskPriority = TaskPriority.MEDIUM  # 任务优先级
     metrics: TaskMetrics = field(default_factory=TaskMetrics)  # 任务指标
-    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))  # 创建时间
-    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))  # 更新时间
+    created_at: datetime = field(default_factory=_utcnow)  # 创建时间
+    updated_at: datetime = field(default_factory=_utcnow)  # 更新时间
     user_id: Optional[str] = None  # 用户ID（可选）
     error_message: Optional[str] = None  # 错误信息（可选）
 
@@ -144,17 +183,19 @@ class Task:
 
     def update_status(self, status: TaskStatus) -> None:
         """更新任务状态"""
+        # 同一次状态变更中的各个时间点使用同一时刻
+        now = datetime.now(timezone.utc)
         self.status = status
-        self.updated_at = datetime.now(timezone.utc)
+        self.updated_at = now
         
         # 如果状态变为运行中，记录开始时间
         if status == TaskStatus.RUNNING and not self.metrics.start_time:
-            self.metrics.start_time = datetime.now(timezone.utc)
+            self.metrics.start_time = now
         
         # 如果状态变为完成，记录结束时间和持续时间
         if status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.STOPPED]:
             if not self.metrics.end_time:
-                self.metrics.end_time = datetime.now(timezone.utc)
+                self.metrics.end_time = now
                 # 计算持续时间
                 if self.metrics.start_time:
                     self.metrics.duration = (
@@ -172,10 +213,10 @@ class Task:
         if total_count is not None:
             self.metrics.total_count = total_count
         if crawled_url:
-            self.metrics.crawled_urls.add(crawled_url)
+            self.metrics.add_crawled_url(crawled_url)
             self.metrics.success_count += 1
         if error_url:
-            self.metrics.error_urls.add(error_url)
+            self.metrics.add_error_url(error_url)
             self.metrics.fail_count += 1
         
         # 更新进度百分比
@@ -6,8 +6,10 @@ from dataclasses import dataclass
 from typing import Optional
 import datetime
 
+from smart_spider.models._compat import _SLOTS
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class User:
     """用户数据模型"""
     id: int
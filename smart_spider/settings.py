@@ -2,18 +2,55 @@
 SmartSpider 的设置管理
 """
 
+import logging
 import os
+import copy
+import types
+import functools
 import yaml
 from dotenv import load_dotenv
-from smart_spider.utils.logger import get_logger
 
 # 从.env文件加载环境变量
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
 if os.path.exists(dotenv_path):
     load_dotenv(dotenv_path)
 
+# 优先使用libyaml的C加载器，未安装libyaml时回退到纯Python实现
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
 # 初始化日志记录器
-logger = get_logger(__name__)
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_yaml(path: str, mtime: float) -> dict:
+    """解析YAML配置文件，按(路径, 修改时间)缓存，文件未变化时不重复解析
+    Args:
+        path: 配置文件路径
+        mtime: 配置文件修改时间，作为缓存键的一部分
+    Returns:
+        dict: 解析结果
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_Loader) or {}
+
+
+def _recursive_namespace(data):
+    """将嵌套字典转换为可按属性访问的命名空间
+    Args:
+        data: 待转换的值
+    Returns:
+        嵌套字典转换为SimpleNamespace，其他值原样返回
+    """
+    if isinstance(data, dict):
+        namespace = types.SimpleNamespace()
+        for key, value in data.items():
+            setattr(namespace, str(key), _recursive_namespace(value))
+        return namespace
+    return data
 
 
 class Settings:
@@ -33,6 +70,27 @@ class Settings:
         # 在测试环境中，应在配置文件或环境变量中设置为True
         if 'delay_init' not in self._settings:
             self._settings['delay_init'] = False
+        
+        # 预先展开所有点分键，get的常见路径只需一次字典查找
+        self._flat = {}
+        self._flatten(self._settings, '', self._flat)
+        
+        # 属性访问视图，如 settings.ns.crawler.delay
+        self.ns = _recursive_namespace(self._settings)
+    
+    @classmethod
+    def _flatten(cls, data, prefix, out):
+        """将嵌套字典展开为点分键，中间层级的字典同样保留
+        Args:
+            data: 待展开的字典
+            prefix: 键前缀
+            out: 输出字典
+        """
+        for key, value in data.items():
+            full_key = f"{prefix}{key}"
+            out[full_key] = value
+            if isinstance(value, dict):
+                cls._flatten(value, f"{full_key}.", out)
     
     def _load_config_file(self):
         """从config.yaml文件加载设置"""
@@ -40,8 +98,8 @@ class Settings:
         
         if os.path.exists(config_path):
             try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    self._settings = yaml.safe_load(f) or {}
+                # 缓存的解析结果是共享的，环境变量覆盖会修改设置，因此取副本
+                self._settings = copy.deepcopy(_load_yaml(config_path, os.path.getmtime(config_path)))
                 logger.info(f"从 {config_path} 加载设置")
             except Exception as e:
                 logger.error(f"加载配置文件错误: {e}")
@@ -75,6 +133,11 @@ class Settings:
     
     def get(self, key, default=None):
         """获取设置值"""
+        try:
+            return self._flat[key]
+        except KeyError:
+            pass
+        
         # 使用点表示法处理嵌套键
         if '.' in key:
             parts = key.split('.')
@@ -94,6 +157,16 @@ class Settings:
         """使用类似字典的访问方式获取设置"""
         return self.get(key)
     
+    def __getattr__(self, name):
+        """未定义的属性委托给属性访问视图，如 settings.crawler.delay"""
+        # 初始化完成前或访问私有属性时不做委托，避免递归
+        if name.startswith('_') or name == 'ns':
+            raise AttributeError(name)
+        try:
+            return getattr(self.ns, name)
+        except AttributeError:
+            raise AttributeError(f"设置项不存在: {name}") from None
+    
     def __repr__(self):
         """设置的字符串表示"""
         return f"Settings({self._settings})"
@@ -1,73 +1,433 @@
 """
 SmartSpider 日志工具
+
+日志记录器只挂载QueueHandler，记录放入队列后立即返回；
+控制台和文件的实际写入由后台线程中的QueueListener完成，不阻塞事件循环。
+
+记录日志时使用%风格的延迟格式化，而不是f-string：
+
+    logger.warning("Cleanup failed: %s", e)
+
+Logger.debug等方法会先检查级别，在该级别未启用时不会格式化消息字符串。
+应用入口还会调用disable_record_metadata，关闭日志格式用不到的调用位置、线程和进程信息采集。
+
+日志文件默认一直保持打开，不检查文件是否被外部移动。由logrotate等工具按重命名方式
+轮转日志时，设置环境变量SMARTSPIDER_LOGROTATE（任意非空值），写入前会检查文件
+是否已被轮转并重新打开。
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
-from typing import Optional
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+
+def disable_record_metadata() -> None:
+    """关闭日志记录的文件名、行号、线程和进程信息采集
+
+    省去每条记录的调用栈遍历（findCaller）和线程/进程信息查询。这些开关作用于整个进程，
+    会让所有日志记录器的%(filename)s、%(lineno)d、%(thread)d等字段失效，
+    因此只由应用入口（main、main_api）调用，导入本包时不做修改。
+    """
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+
+class _CachedTimeFormatter(logging.Formatter):
+    """按秒缓存asctime的格式化器
 
+    默认的formatTime每条记录都调用time.localtime和time.strftime；
+    同一秒内的记录复用已格式化的时间字符串，只拼接毫秒部分。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (秒, 日期格式, 格式化结果)，整体替换保证多线程读取时的一致性
+        self._cached = (None, None, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        sec = int(record.created)
+        cached_sec, cached_fmt, cached_str = self._cached
+        if sec != cached_sec or datefmt != cached_fmt:
+            cached_str = time.strftime(datefmt or self.default_time_format, self.converter(sec))
+            self._cached = (sec, datefmt, cached_str)
+        if datefmt or not self.default_msec_format:
+            return cached_str
+        return self.default_msec_format % (cached_str, record.msecs)
+
+
+# 统一的格式化器
+_FORMATTER = _CachedTimeFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# 所有日志记录器共用的日志队列及后台监听器（首次调用get_logger时启动）
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+# 各日志记录器在监听器上挂载的文件处理器，按日志记录器名称索引
+_logger_file_handlers: Dict[str, logging.Handler] = {}
+# 实际写文件的处理器，按日志文件绝对路径索引；同一文件只打开一次，退出时统一关闭
+_file_handlers: Dict[str, "BufferedFileHandler"] = {}
+# 已配置的日志记录器及其配置参数，参数相同的重复调用直接返回
+_configured: Dict[str, Tuple[Optional[str], Union[str, int], bool]] = {}
 
-def get_logger(name: str, log_file: Optional[str] = None, log_level: str = "INFO") -> logging.Logger:
+# 所有日志文件共用一个后台刷新线程，定期写出文件缓冲区（首次打开日志文件时启动）
+_FLUSH_INTERVAL = 5.0
+_flush_thread: Optional[threading.Thread] = None
+_flush_stop = threading.Event()
+
+# 包的根日志记录器：由logging_config统一配置，包内模块的记录传播到这里输出
+_ROOT_LOGGER_NAME = "smart_spider"
+
+
+class BufferedFileHandler(logging.StreamHandler):
+    """使用大缓冲区写文件的处理器
+
+    标准FileHandler每写一条记录就flush一次；这里只在缓冲区写满、
+    出现ERROR及以上级别的记录、后台线程定时刷新或关闭时才写入磁盘。
+    这是文件日志唯一的缓冲层，进程异常退出时最多丢失一个缓冲区或一个刷新间隔内的记录。
+    """
+
+    def __init__(self, filename: str, buffer_size: int = 1 << 16):
+        """
+        参数:
+            filename (str): 日志文件路径
+            buffer_size (int): 文件缓冲区大小（字节）
+        """
+        self.baseFilename = os.path.abspath(filename)
+        self.buffer_size = buffer_size
+        super().__init__(self._open())
+
+    def _open(self):
+        """以追加方式打开日志文件"""
+        return open(self.baseFilename, "a", buffering=self.buffer_size, encoding="utf-8")
+
+    def _reopen(self) -> None:
+        """重新打开日志文件"""
+        self.stream = self._open()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """写入一条记录，不逐条flush
+
+        处理器被关闭后（例如dictConfig关闭已有处理器）再次收到记录时重新打开文件，
+        与标准库FileHandler的行为一致。
+        """
+        try:
+            if self.stream is None:
+                self._reopen()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        """写出缓冲区并关闭文件"""
+        self.acquire()
+        try:
+            if self.stream is not None:
+                try:
+                    self.stream.flush()
+                finally:
+                    stream, self.stream = self.stream, None
+                    stream.close()
+        finally:
+            self.release()
+            super().close()
+
+
+class WatchedBufferedFileHandler(BufferedFileHandler):
+    """日志文件被轮转后自动重新打开的BufferedFileHandler
+
+    与logging.handlers.WatchedFileHandler相同，每次写入前检查文件的设备号和inode，
+    文件被移动或删除时重新打开；这会为每条记录多一次stat调用，只在启用日志轮转时使用。
+    """
+
+    def __init__(self, filename: str, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._stat_stream()
+
+    def _reopen(self) -> None:
+        """重新打开日志文件并记录新文件的设备号和inode"""
+        super()._reopen()
+        self._stat_stream()
+
+    def _stat_stream(self) -> None:
+        """记录当前打开文件的设备号和inode"""
+        sres = os.fstat(self.stream.fileno())
+        self.dev, self.ino = sres.st_dev, sres.st_ino
+
+    def _reopen_if_needed(self) -> None:
+        """文件已被轮转时写出旧文件的缓冲区并重新打开"""
+        try:
+            sres = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            sres = None
+        if sres is None or sres.st_dev != self.dev or sres.st_ino != self.ino:
+            self.stream.flush()
+            self.stream.close()
+            self._reopen()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """检查文件是否被轮转后写入一条记录"""
+        if self.stream is not None:
+            try:
+                self._reopen_if_needed()
+            except Exception:
+                self.handleError(record)
+                return
+        super().emit(record)
+
+
+class _LoggerFileHandler(logging.Handler):
+    """把指定日志记录器的记录转交给共享文件处理器
+
+    同一日志文件的处理器可能被多个日志记录器共用，按日志记录器名称的过滤放在这一层；
+    本身不缓冲，关闭时也不关闭共享的文件处理器。
+    """
+
+    def __init__(self, name: str, target: BufferedFileHandler):
+        """
+        参数:
+            name (str): 日志记录器名称，只接收该日志记录器及其子记录器的记录
+            target (BufferedFileHandler): 实际写文件的处理器
+        """
+        super().__init__()
+        self.target = target
+        self.addFilter(logging.Filter(name))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """转交给文件处理器"""
+        self.target.handle(record)
+
+
+def _flush_loop() -> None:
+    """后台刷新线程：每隔_FLUSH_INTERVAL秒写出所有日志文件的缓冲区"""
+    while not _flush_stop.wait(_FLUSH_INTERVAL):
+        for file_handler in list(_file_handlers.values()):
+            file_handler.flush()
+
+
+def _ensure_flush_thread() -> None:
+    """启动后台刷新线程（仅首次调用时创建，调用方需持有_listener_lock）"""
+    global _flush_thread
+    if _flush_thread is None:
+        _flush_thread = threading.Thread(target=_flush_loop, name="smart_spider-log-flush", daemon=True)
+        _flush_thread.start()
+
+
+def _shutdown_listener() -> None:
+    """停止后台监听器和刷新线程并关闭处理器，确保退出前日志全部写出"""
+    global _listener, _flush_thread
+    with _listener_lock:
+        if _listener is None:
+            return
+        # 先停止监听器，队列中剩余的记录全部交给处理器后再关闭文件
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _flush_stop.set()
+        if _flush_thread is not None:
+            _flush_thread.join()
+        for file_handler in _file_handlers.values():
+            file_handler.close()
+        _file_handlers.clear()
+        _logger_file_handlers.clear()
+        # 已配置的日志记录器挂着写入旧监听器的处理器，再次调用get_logger时重新配置
+        _configured.clear()
+        _flush_stop.clear()
+        _flush_thread = None
+        _listener = None
+
+
+def _console_enabled(record: logging.LogRecord) -> bool:
+    """控制台处理器的过滤器：只输出来源日志记录器开启了控制台输出的记录"""
+    return getattr(record, "console", True)
+
+
+def _default_console(log_file: Optional[str]) -> bool:
+    """默认是否输出到控制台
+
+    没有日志文件时始终输出到控制台；写日志文件时只在stderr连接终端时输出，
+    避免CI等场景下stderr被捕获后与日志文件重复记录。
+    """
+    if not log_file:
+        return True
+    return sys.stderr is not None and sys.stderr.isatty()
+
+
+def _new_queue_handler(with_console: bool) -> logging.Handler:
+    """创建写入共享队列的QueueHandler，并在记录上标记是否输出到控制台"""
+    def mark_console(record: logging.LogRecord) -> bool:
+        record.console = with_console
+        return True
+    
+    queue_handler = logging.handlers.QueueHandler(_log_queue)
+    queue_handler.addFilter(mark_console)
+    return queue_handler
+
+
+def _ensure_listener() -> logging.handlers.QueueListener:
+    """启动后台监听器（仅首次调用时创建），控制台处理器由监听器持有"""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(_FORMATTER)
+            console_handler.addFilter(_console_enabled)
+            _listener = logging.handlers.QueueListener(
+                _log_queue, console_handler, respect_handler_level=True
+            )
+            _listener.start()
+            atexit.register(_shutdown_listener)
+        return _listener
+
+
+def _set_file_handler(name: str, handler: Optional[logging.Handler]) -> None:
+    """替换日志记录器在监听器上的文件处理器
+    Args:
+        name: 日志记录器名称
+        handler: 新的文件处理器，为None时只移除旧的处理器
+    """
+    with _listener_lock:
+        handlers = list(_listener.handlers)
+        old_handler = _logger_file_handlers.pop(name, None)
+        if old_handler is not None:
+            handlers.remove(old_handler)
+        if handler is not None:
+            _logger_file_handlers[name] = handler
+            handlers.append(handler)
+        # 整体替换元组，监听线程读取到的始终是完整的处理器列表
+        _listener.handlers = tuple(handlers)
+
+
+def _pick_file_handler(abs_path: str) -> BufferedFileHandler:
+    """按是否启用日志轮转选择文件处理器：设置了SMARTSPIDER_LOGROTATE时检查文件轮转，否则直接写入"""
+    if os.environ.get("SMARTSPIDER_LOGROTATE"):
+        return WatchedBufferedFileHandler(abs_path)
+    return BufferedFileHandler(abs_path)
+
+
+def _make_file_handler(abs_path: str) -> BufferedFileHandler:
+    """打开日志文件并创建写文件的处理器"""
+    # 确保日志目录存在
+    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+    file_handler = _pick_file_handler(abs_path)
+    file_handler.setFormatter(_FORMATTER)
+    return file_handler
+
+
+def _get_file_handler(log_file: str) -> BufferedFileHandler:
+    """获取日志文件对应的文件处理器，同一路径复用已打开的处理器"""
+    abs_path = os.path.abspath(log_file)
+    file_handler = _file_handlers.get(abs_path)
+    if file_handler is None:
+        with _listener_lock:
+            file_handler = _file_handlers.get(abs_path)
+            if file_handler is None:
+                file_handler = _file_handlers[abs_path] = _make_file_handler(abs_path)
+                _ensure_flush_thread()
+    return file_handler
+
+
+def _build_file_handler(name: str, log_file: str) -> logging.Handler:
+    """创建挂在监听器上的文件处理器（只接收指定日志记录器的记录）"""
+    return _LoggerFileHandler(name, _get_file_handler(log_file))
+
+
+def make_queue_handler(logger_name: str, log_file: Optional[str] = None,
+                       with_console: Optional[bool] = None) -> logging.Handler:
+    """dictConfig使用的处理器工厂：启动监听器、挂载文件处理器，返回写入共享队列的QueueHandler"""
+    _ensure_listener()
+    _set_file_handler(logger_name, _build_file_handler(logger_name, log_file) if log_file else None)
+    return _new_queue_handler(_default_console(log_file) if with_console is None else with_console)
+
+
+def _resolve_level(log_level: Union[str, int]) -> int:
+    """解析日志级别名称或数值，未知名称回退到INFO"""
+    # 级别名称由标准库解析
+    level = logging.getLevelName(log_level.upper()) if isinstance(log_level, str) else log_level
+    return level if isinstance(level, int) else logging.INFO
+
+
+def get_logger(name: str, log_file: Optional[str] = None, log_level: Union[str, int, None] = None,
+               with_console: Optional[bool] = None) -> logging.Logger:
     """
     获取具有指定名称和配置的日志记录器
     
     参数:
         name (str): 日志记录器名称
         log_file (str, 可选): 日志文件路径
-        log_level (str): 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        log_level (str | int, 可选): 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL) 或级别数值，
+            默认为INFO；包内模块的日志记录器未指定时沿用setup_logging的配置
+        with_console (bool, 可选): 是否输出到控制台，默认在没有日志文件或stderr连接终端时输出
     
     返回:
         logging.Logger: 配置好的日志记录器
     """
+    # 包内模块（smart_spider.*）的日志由应用入口调用setup_logging统一配置，
+    # 未指定文件和控制台输出时不挂处理器，只按需设置级别
+    if log_file is None and with_console is None and name.startswith(_ROOT_LOGGER_NAME + "."):
+        logger = logging.getLogger(name)
+        if log_level is not None:
+            logger.setLevel(_resolve_level(log_level))
+        return logger
+    
     # 创建日志记录器
     logger = logging.getLogger(name)
     
+    # 以相同参数配置过的日志记录器直接返回，不重建处理器
+    if with_console is None:
+        with_console = _default_console(log_file)
+    config_key = (log_file, log_level, with_console)
+    if _configured.get(name) == config_key:
+        return logger
+    
     # 设置日志级别
-    level_map = {
-        "DEBUG": logging.DEBUG,
-        "INFO": logging.INFO,
-        "WARNING": logging.WARNING,
-        "ERROR": logging.ERROR,
-        "CRITICAL": logging.CRITICAL
-    }
-    logger.setLevel(level_map.get(log_level.upper(), logging.INFO))
+    logger.setLevel(_resolve_level("INFO" if log_level is None else log_level))
     
     # 如果日志记录器已有处理器，清除它们
     if logger.handlers:
         logger.handlers.clear()
     
-    # 创建格式化器
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    # 控制台输出由后台监听器统一负责，按记录上的标记决定是否输出
+    _ensure_listener()
     
-    # 创建控制台处理器
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    # 如果提供了log_file，创建文件处理器（挂在监听器上，只接收该日志记录器的记录）
+    _set_file_handler(name, _build_file_handler(name, log_file) if log_file else None)
     
-    # 如果提供了log_file，创建文件处理器
-    if log_file:
-        # 确保日志目录存在
-        log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    # 日志记录器本身只做入队；不向上传播，避免父级处理器重复输出。
+    # 既不写文件也不输出到控制台时交给上级处理器，避免记录被丢弃
+    logger.addHandler(_new_queue_handler(with_console))
+    logger.propagate = not (log_file or with_console)
+    _configured[name] = config_key
     
     return logger
 
 
-# 使用示例
-if __name__ == '__main__':
+def _demo() -> None:
+    """使用示例：向控制台和test.log输出各级别的日志"""
+    from pathlib import Path
+    
+    # 删除上次运行留下的日志文件，避免追加写入使文件不断增长
+    Path("test.log").unlink(missing_ok=True)
+    
     # 创建日志记录器
-    logger = get_logger("test_logger", log_file="test.log", log_level="DEBUG")
+    logger = get_logger("test_logger", log_file="test.log", log_level="DEBUG", with_console=True)
     
     # 在不同级别记录消息
     logger.debug("这是一条调试消息")
     logger.info("这是一条信息消息")
     logger.warning("这是一条警告消息")
     logger.error("这是一条错误消息")
-    logger.critical("这是一条严重错误消息")
\ No newline at end of file
+    logger.critical("这是一条严重错误消息")
+
+
+if __name__ == '__main__':
+    _demo()
@@ -5,20 +5,61 @@ SmartSpider 基本功能测试
 import asyncio
 import pytest
 import os
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from types import SimpleNamespace
 
 from smart_spider.core.task_manager import TaskManager
 from smart_spider.core.cookie_manager import CookieManager
 from smart_spider.core.proxy_manager import ProxyManager
+from smart_spider.models.cookie import CookieItem, CookiePool, LeaseStatus
 from smart_spider.settings import settings
 from smart_spider.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _check_directories(root, directories):
+    """检查目录是否存在，返回问题描述列表
+    
+    每个父目录只列举一次，用DirEntry缓存的类型信息判断
+    """
+    listings = {}
+    messages = []
+    for dir_path in directories:
+        parent, _, name = dir_path.rpartition("/")
+        if parent not in listings:
+            try:
+                with os.scandir(root / parent) as it:
+                    listings[parent] = {entry.name: entry for entry in it}
+            except FileNotFoundError:
+                listings[parent] = {}
+        
+        full_path = root / dir_path
+        entry = listings[parent].get(name)
+        if entry is None:
+            messages.append(f"目录不存在: {full_path}")
+        elif not entry.is_dir():
+            messages.append(f"路径不是目录: {full_path}")
+    return messages
+
 
 class TestSmartSpiderBasic:
     """测试SmartSpider的基本功能"""
 
+    @classmethod
+    def setup_class(cls):
+        """整个测试类共用一个事件循环执行清理，避免每个测试都新建和销毁事件循环"""
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def teardown_class(cls):
+        """关闭共用的事件循环"""
+        cls.loop.close()
+
     def setup_method(self):
         """测试前的设置"""
         logger.info("Starting tests for SmartSpider")
@@ -36,28 +77,33 @@ class TestSmartSpiderBasic:
         """测试后的清理"""
         logger.info("Cleaning up after tests")
         # 清理测试数据
-        asyncio.run(self._cleanup_test_data())
+        self.loop.run_until_complete(self._cleanup_test_data())
 
     async def _cleanup_test_data(self):
-        """异步清理测试数据"""
-        try:
-            # 删除测试任务
-            if hasattr(self.task_manager, 'tasks') and self.test_task_id in self.task_manager.tasks:
-                await self.task_manager.delete_task(self.test_task_id)
-            
-            # 删除测试Cookie
-            if hasattr(self.cookie_manager, 'cookie_pools'):
-                for pool in self.cookie_manager.cookie_pools.values():
-                    cookies_to_remove = [c.id for c in pool.cookies if c.id == self.test_cookie_id]
-                    for cookie_id in cookies_to_remove:
-                        await self.cookie_manager.remove_cookie(pool.id, cookie_id)
-            
-            # 删除测试代理池和代理
-            if hasattr(self.proxy_manager, 'proxy_pools'):
-                if self.test_pool_id in self.proxy_manager.proxy_pools:
-                    await self.proxy_manager.delete_proxy_pool(self.test_pool_id)
-        except Exception as e:
-            logger.warning(f"Cleanup failed: {e}")
+        """异步清理测试数据（各项清理互不依赖，并发执行）"""
+        coros = []
+        
+        # 删除测试任务
+        if hasattr(self.task_manager, 'tasks') and self.test_task_id in self.task_manager.tasks:
+            coros.append(self.task_manager.delete_task(self.test_task_id))
+        
+        # 删除测试Cookie
+        if hasattr(self.cookie_manager, 'cookie_pools'):
+            coros.extend(
+                self.cookie_manager.remove_cookie(pool.id, self.test_cookie_id)
+                for pool in self.cookie_manager.cookie_pools.values()
+                if self.test_cookie_id in pool.cookies_by_id
+            )
+        
+        # 删除测试代理池和代理
+        if hasattr(self.proxy_manager, 'proxy_pools'):
+            if self.test_pool_id in self.proxy_manager.proxy_pools:
+                coros.append(self.proxy_manager.delete_proxy_pool(self.test_pool_id))
+        
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Cleanup failed: %s", result)
 
     def test_settings_load(self):
         """测试配置加载功能"""
@@ -86,8 +132,7 @@ class TestSmartSpiderBasic:
                 assert log_file.exists(), "日志文件不存在"
             else:
                 # 如果是相对路径，相对于项目根目录
-                project_root = Path(__file__).parent.parent
-                log_file_path = project_root / log_path
+                log_file_path = PROJECT_ROOT / log_path
                 assert log_file_path.exists(), "日志文件不存在"
 
     @pytest.mark.asyncio
@@ -149,13 +194,51 @@ class TestSmartSpiderBasic:
             assert cookie is not None, "Cookie添加失败"
             
             # 获取Cookie
-            retrieved_cookie = next((c for c in pool.cookies if c.id == cookie.id), None)
+            retrieved_cookie = pool.cookies_by_id.get(cookie.id)
             assert retrieved_cookie is not None, "Cookie获取失败"
             assert retrieved_cookie.name == "test_cookie", "Cookie名称不匹配"
             
         except Exception as e:
             pytest.fail(f"Cookie管理器测试失败: {e}")
 
+    @pytest.mark.asyncio
+    async def test_cookie_lease(self):
+        """测试Cookie租用功能"""
+        # 直接放入Cookie池，租用流程只依赖池中的Cookie
+        pool = CookiePool(name="Test Lease Pool")
+        cookie = CookieItem(
+            domain="example.com",
+            name="lease_cookie",
+            value="lease_value",
+            expires=datetime.now(timezone.utc) + timedelta(hours=1),
+            id=self.test_cookie_id
+        )
+        pool.add_cookie(cookie)
+        self.cookie_manager.cookie_pools[pool.id] = pool
+        
+        try:
+            # 租用Cookie
+            lease = await self.cookie_manager.lease_cookie(pool.id, self.test_task_id, ttl=60)
+            assert lease is not None, "Cookie租用失败"
+            assert lease.cookie_id == cookie.id, "租用的Cookie不匹配"
+            assert lease.pool_id == pool.id, "租用的Cookie池不匹配"
+            assert lease.status == LeaseStatus.ACTIVE, "租用状态错误"
+            assert isinstance(lease.expires_at, datetime), "租用过期时间类型错误"
+            assert 0 < (lease.expires_at - datetime.now(timezone.utc)).total_seconds() <= 60, "租用时长错误"
+            
+            # 租用中的Cookie不能被再次租用
+            assert await self.cookie_manager.lease_cookie(pool.id, self.test_task_id) is None, "Cookie被重复租用"
+            
+            # 获取租用的Cookie信息
+            leased = await self.cookie_manager.get_leased_cookie(lease.id)
+            assert leased is not None and leased['value'] == "lease_value", "租用的Cookie信息错误"
+            
+            # 释放租用
+            assert await self.cookie_manager.release_cookie(lease.id), "Cookie租用释放失败"
+            assert lease.status == LeaseStatus.RELEASED, "释放后租用状态错误"
+        finally:
+            self.cookie_manager.cookie_pools.pop(pool.id, None)
+
     @pytest.mark.asyncio
     async def test_proxy_manager(self):
         """测试代理管理器功能"""
@@ -183,17 +266,51 @@ class TestSmartSpiderBasic:
             assert proxy is not None, "代理添加失败"
             
             # 获取代理
-            retrieved_proxy = next((p for p in pool.proxies if p.id == proxy.id), None)
+            retrieved_proxy = pool.proxies_by_id.get(proxy.id)
             assert retrieved_proxy is not None, "代理获取失败"
             assert retrieved_proxy.ip == "127.0.0.1", "代理IP不匹配"
             
         except Exception as e:
             pytest.fail(f"代理管理器测试失败: {e}")
 
+    def test_cleanup_loop_shared(self):
+        """测试清理使用整个测试类共用的事件循环"""
+        assert self.loop is TestSmartSpiderBasic.loop, "清理未使用共用的事件循环"
+        assert not self.loop.is_closed(), "共用的事件循环被提前关闭"
+        assert self.loop.run_until_complete(asyncio.sleep(0, result=True)), "共用的事件循环无法执行协程"
+
+    def test_cleanup_runs_concurrently(self):
+        """测试各项清理并发执行，某一项失败不影响其他清理"""
+        events = []
+
+        async def record(name, fail=False):
+            events.append(f"start {name}")
+            await asyncio.sleep(0)
+            events.append(f"end {name}")
+            if fail:
+                raise RuntimeError(name)
+
+        pool = SimpleNamespace(id="pool", cookies_by_id={self.test_cookie_id: None})
+        self.task_manager = SimpleNamespace(
+            tasks={self.test_task_id: None}, delete_task=lambda task_id: record("task", fail=True)
+        )
+        self.cookie_manager = SimpleNamespace(
+            cookie_pools={pool.id: pool}, remove_cookie=lambda pool_id, cookie_id: record("cookie")
+        )
+        self.proxy_manager = SimpleNamespace(
+            proxy_pools={self.test_pool_id: None}, delete_proxy_pool=lambda pool_id: record("proxy")
+        )
+
+        self.loop.run_until_complete(self._cleanup_test_data())
+        assert events[:3] == ["start task", "start cookie", "start proxy"], "清理未并发执行"
+        assert sorted(events[3:]) == ["end cookie", "end proxy", "end task"], "清理失败影响了其他清理"
+        self.task_manager.tasks.clear()
+        self.cookie_manager.cookie_pools.clear()
+        self.proxy_manager.proxy_pools.clear()
+
     def test_directories_exist(self):
         """测试必要的目录是否存在"""
         # 检查必要的目录
-        project_root = Path(__file__).parent.parent
         directories = [
             "logs",
             "data",
@@ -202,10 +319,19 @@ class TestSmartSpiderBasic:
             "cache/crawler"
         ]
         
-        for dir_path in directories:
-            full_path = project_root / dir_path
-            assert full_path.exists(), f"目录不存在: {full_path}"
-            assert full_path.is_dir(), f"路径不是目录: {full_path}"
+        messages = _check_directories(PROJECT_ROOT, directories)
+        assert not messages, "\n".join(messages)
+
+    def test_check_directories(self, tmp_path):
+        """测试目录检查能发现缺失的目录和不是目录的路径"""
+        (tmp_path / "data" / "tasks").mkdir(parents=True)
+        (tmp_path / "data" / "crawled").write_text("")
+        messages = _check_directories(tmp_path, ["data", "data/tasks", "data/crawled", "logs", "cache/crawler"])
+        assert messages == [
+            f"路径不是目录: {tmp_path / 'data/crawled'}",
+            f"目录不存在: {tmp_path / 'logs'}",
+            f"目录不存在: {tmp_path / 'cache/crawler'}",
+        ], "目录检查结果错误"
 
 
 if __name__ == "__main__":
@@ -0,0 +1,324 @@
+"""
+SmartSpider 数据模型测试
+"""
+
+import asyncio
+import logging
+import sys
+from dataclasses import asdict
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import yaml
+from pydantic import UUID4, TypeAdapter
+
+from smart_spider.core.cookie_manager import CookieManager
+from smart_spider.core.storage import FileSystemStorage
+from smart_spider.models.cookie import CookieItem, CookieLease, CookiePool, CookieSource, CookieStatus
+from smart_spider.core.proxy_manager import ProxyItem, ProxyPool
+from smart_spider.models import _compat
+from smart_spider.models.task import Task, TaskConfig, TaskMetrics, TaskStatus
+from smart_spider.models.user import User
+
+
+def _make_pool(**kwargs) -> CookiePool:
+    """创建包含有效、已过期和被阻塞Cookie的Cookie池"""
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    pool = CookiePool(name="Test Cookie Pool", **kwargs)
+    pool.add_cookie(CookieItem(domain="example.com", name="a", value="1"))
+    pool.add_cookie(CookieItem(domain="example.com", name="b", value="2", expires=past))
+    pool.add_cookie(CookieItem(domain="example.org", name="c", value="3", status=CookieStatus.BLOCKED))
+    pool.add_cookie(CookieItem(domain="example.org", name="d", value="4"))
+    return pool
+
+
+class TestModels:
+    """测试数据模型"""
+
+    def test_to_dict_enum_values(self):
+        """测试to_dict输出枚举的字符串值"""
+        task = Task(config=TaskConfig(name="Test Task", entry_urls=["https://example.com"]))
+        task.status = TaskStatus.RUNNING
+        task_dict = task.to_dict()
+        assert type(task_dict['status']) is str, "任务状态不是字符串"
+        assert task_dict['status'] == "running", "任务状态值错误"
+        assert type(task_dict['priority']) is str, "任务优先级不是字符串"
+
+        pool = CookiePool(name="Test Cookie Pool")
+        pool.add_cookie(CookieItem(domain="example.com", name="a", value="1", status=CookieStatus.BLOCKED))
+        pool_dict = pool.to_dict()
+        assert type(pool_dict['type']) is str, "Cookie池类型不是字符串"
+        assert pool_dict['cookies'][0]['status'] == "blocked", "Cookie状态值错误"
+        assert type(pool_dict['cookies'][0]['source']) is str, "Cookie来源不是字符串"
+
+        # 输出可以直接安全地序列化为YAML
+        assert "status: running" in yaml.safe_dump(task_dict)
+        assert "status: blocked" in yaml.safe_dump(pool_dict)
+
+    def test_task_config_to_dict_fields(self):
+        """测试TaskConfig.to_dict与asdict输出一致，并能还原配置"""
+        config = TaskConfig(
+            name="Test Task", entry_urls=["https://example.com"],
+            selectors={'title': 'h1'}, custom_headers={'X-Test': '1'}
+        )
+        config_dict = config.to_dict()
+        assert config_dict == asdict(config), "to_dict字段与dataclass字段不一致"
+        assert TaskConfig.from_dict(config_dict) == config, "from_dict无法还原配置"
+
+    def test_cookie_timestamps(self):
+        """测试Cookie和租用记录以浮点时间戳存储时间，字典往返保持不变"""
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        cookie = CookieItem(domain="example.com", name="a", value="1", expires=expires)
+        assert cookie.expires_ts == expires.timestamp(), "过期时间未转换为时间戳"
+        assert cookie.expires == expires, "过期时间属性错误"
+        assert not cookie.is_expired(), "未过期的Cookie被判定为过期"
+        assert cookie.is_expired(now=expires.timestamp() + 1), "过期的Cookie未被判定为过期"
+
+        restored = CookieItem.from_dict(cookie.to_dict())
+        assert restored.expires_ts == cookie.expires_ts, "过期时间往返后不一致"
+        assert restored.last_used_at is None, "未使用的Cookie最后使用时间应为空"
+
+        lease = CookieLease(pool_id="p", cookie_name="a", domain="example.com")
+        assert lease.expires_ts - lease.leased_ts == 3600, "默认租用时长错误"
+        # ISO字符串只保留到微秒
+        assert CookieLease.from_dict(lease.to_dict()).expires_ts == pytest.approx(lease.expires_ts, abs=1e-6), \
+            "租用过期时间往返后不一致"
+
+    def test_cookie_pool_sweep_and_stats(self):
+        """测试单次取时筛选有效Cookie，统计按状态一次计数"""
+        pool = _make_pool()
+        assert pool.get_stats()['valid'] == 3, "过期前的有效数量错误"
+        assert [c.name for c in pool.get_valid_cookies()] == ['a', 'd'], "有效Cookie筛选错误"
+        assert pool.get_stats() == {
+            'total': 4, 'valid': 2, 'expired': 1, 'invalid': 0, 'blocked': 1, 'in_use': 0
+        }, "Cookie池统计错误"
+
+    def test_cookie_pool_domain_index(self):
+        """测试按域名索引查找Cookie，删除和外部修改列表后索引保持一致"""
+        pool = _make_pool()
+        assert pool.get_cookie_for_domain("example.org").name == "d", "按域名获取Cookie错误"
+        assert pool.get_cookie_for_domain("missing.com") is None, "不存在的域名应返回None"
+
+        # 删除中间的Cookie后，末尾的Cookie移到空位，索引随之更新
+        assert pool.remove_cookie("a", "example.com")
+        assert not pool.remove_cookie("a", "example.com"), "重复删除应返回False"
+        assert [c.name for c in pool.get_domain_cookies("example.org")] == ["c", "d"], "删除后域名索引错误"
+        assert pool.get_cookie_for_domain("example.com") is None, "删除后仍返回已删除的Cookie"
+
+        # 直接修改cookies列表时重建索引
+        pool.cookies.append(CookieItem(domain="example.net", name="e", value="5"))
+        assert pool.get_cookie_for_domain("example.net").name == "e", "外部添加的Cookie未进入索引"
+
+        # 原地替换列表元素时同样重建索引
+        pool.cookies[0] = CookieItem(domain="b.com", name="f", value="6")
+        assert pool.get_cookie_for_domain("b.com").name == "f", "原地替换的Cookie未进入索引"
+        assert [c.name for c in pool.get_domain_cookies("example.org")] == ["c"], "被替换的Cookie仍在索引中"
+
+        # 整体替换列表后重建索引，通过池的方法增删不触发重建
+        pool.cookies = [CookieItem(domain="c.com", name="g", value="7")]
+        assert pool.get_cookie_for_domain("c.com").name == "g", "替换列表后索引未重建"
+        with patch.object(CookiePool, '_rebuild_index', autospec=True) as rebuild:
+            pool.add_cookie(CookieItem(domain="c.com", name="h", value="8"))
+            assert pool.remove_cookie("g", "c.com")
+            assert [c.name for c in pool.get_domain_cookies("c.com")] == ["h"], "增删后域名索引错误"
+        rebuild.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_update_cookie_keeps_index(self, tmp_path):
+        """测试通过管理器修改Cookie的域名后，按新域名查找和按ID删除都正确"""
+        manager = object.__new__(CookieManager)
+        manager.cookie_pools = {}
+        manager.cookie_leases = {}
+        manager.pool_lock = asyncio.Lock()
+        manager.logger = logging.getLogger(__name__)
+        manager.storage = FileSystemStorage({'path': str(tmp_path), 'format': 'json'})
+        pool = _make_pool()
+        manager.cookie_pools[pool.id] = pool
+        cookie = pool.cookies[0]
+
+        updated = await manager.update_cookie(pool.id, cookie.id, {'domain': 'b.com'})
+        assert updated is cookie, "更新Cookie失败"
+        assert pool.get_domain_cookies('b.com') == [cookie], "按新域名查找不到Cookie"
+        assert pool.get_cookies_dict('b.com') == {'a': '1'}, "按新域名获取Cookie字典错误"
+        assert pool.get_domain_cookies('example.com') == [pool.cookies[1]], "旧域名索引仍包含Cookie"
+
+        assert await manager.remove_cookie(pool.id, cookie.id), "按ID删除修改过的Cookie失败"
+        assert cookie not in pool.cookies, "Cookie仍在池中"
+        assert pool.get_domain_cookies('b.com') == [], "删除后域名索引错误"
+        assert not await manager.remove_cookie(pool.id, cookie.id), "重复删除应返回False"
+
+    def test_remove_cookie_by_id_with_duplicate_key(self):
+        """测试修改导致(domain, name, path)重复时，按ID删除的是指定的Cookie"""
+        pool = _make_pool()
+        first, second = pool.cookies[0], pool.cookies[3]
+        second.domain, second.name = first.domain, first.name
+        pool.reindex()
+        assert pool.remove_cookie_by_id(first.id), "按ID删除失败"
+        assert first not in pool.cookies and second in pool.cookies, "删除了错误的Cookie"
+        domain_cookies = pool.get_domain_cookies('example.com')
+        assert len(domain_cookies) == 2 and second in domain_cookies, "删除后域名索引错误"
+        assert not pool.remove_cookie_by_id(first.id), "重复删除应返回False"
+
+    def test_to_dict_plain_values(self):
+        """测试to_dict输出可直接序列化的普通值，并能通过from_dict还原"""
+        cookie = CookieItem(domain="example.com", name="a", value="1")
+        cookie_dict = cookie.to_dict()
+        assert cookie_dict['expires'] is None, "会话Cookie的过期时间应为None"
+        assert cookie_dict['created_at'] == cookie.created_at.isoformat(), "创建时间格式错误"
+        assert CookieItem.from_dict(cookie_dict).to_dict() == cookie.to_dict(), "Cookie字典往返后不一致"
+
+        metrics = TaskMetrics(start_time=datetime.now(timezone.utc))
+        metrics.add_crawled_url("https://example.com")
+        metrics_dict = metrics.to_dict()
+        assert metrics_dict['crawled_urls'] == ["https://example.com"], "URL集合未转换为列表"
+        assert metrics_dict['start_time'] == metrics.start_time.isoformat(), "开始时间格式错误"
+        assert metrics_dict['end_time'] is None, "未设置的结束时间应为None"
+        assert TaskMetrics.from_dict(metrics_dict) == metrics, "指标字典往返后不一致"
+
+    def test_refresh_cookies_marks_expired(self):
+        """测试刷新时把已过期的Cookie标记为过期并返回过期数量"""
+        pool = _make_pool()
+        updated_at = pool.updated_at
+        assert pool.refresh_cookies() == 1, "过期数量错误"
+        assert pool.cookies_by_id[pool.cookies[1].id].status == CookieStatus.EXPIRED, "过期Cookie未被标记"
+        assert [c.status for c in pool.cookies].count(CookieStatus.EXPIRED) == 1, "未过期的Cookie被标记"
+        assert pool.updated_at >= updated_at, "有过期Cookie时未更新时间"
+        assert pool.refresh_cookies() == 1, "重复刷新时已过期的Cookie应继续计数"
+
+    def test_metrics_url_retention(self):
+        """测试URL集合超过保留上限后只计数，旧数据按URL列表补齐累计数"""
+        metrics = TaskMetrics(max_url_retention=3)
+        for i in range(5):
+            metrics.add_crawled_url(f"https://example.com/{i}")
+        metrics.add_error_url("https://example.com/error")
+        assert len(metrics.crawled_urls) == 3, "URL集合超过保留上限"
+        assert metrics.crawled_total == 5, "累计数量错误"
+        assert metrics.error_total == 1, "失败累计数量错误"
+
+        legacy = TaskMetrics.from_dict({'crawled_urls': ["https://example.com/a", "https://example.com/b"]})
+        assert legacy.crawled_total == 2, "旧数据的累计数量未按URL列表补齐"
+
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass的slots参数需要Python 3.10+")
+    def test_models_use_slots(self):
+        """测试数据模型实例不携带__dict__"""
+        task = Task(config=TaskConfig(name="Test Task", entry_urls=["https://example.com"]))
+        pool = _make_pool()
+        lease = CookieLease(pool_id=pool.id, cookie_name="a", domain="example.com")
+        user = User(id=1, username="test", email="test@example.com")
+        for model in (task, task.config, task.metrics, pool, pool.cookies[0], lease, user):
+            assert not hasattr(model, '__dict__'), f"{type(model).__name__}未使用slots"
+        assert _compat._SLOTS == {'slots': True}
+
+    def test_update_status_single_timestamp(self):
+        """测试一次状态变更中的各个时间点使用同一时刻"""
+        task = Task(config=TaskConfig(name="Test Task", entry_urls=["https://example.com"]))
+        task.update_status(TaskStatus.RUNNING)
+        assert task.metrics.start_time == task.updated_at, "开始时间与更新时间不一致"
+
+        task.update_status(TaskStatus.COMPLETED)
+        assert task.metrics.end_time == task.updated_at, "结束时间与更新时间不一致"
+        assert task.metrics.duration == (task.metrics.end_time - task.metrics.start_time).total_seconds()
+
+    def test_cookie_from_dict_conversions(self):
+        """测试from_dict按字段表转换时间和枚举字段"""
+        cookie = CookieItem.from_dict({
+            'domain': "example.com", 'name': "a", 'value': "1",
+            'expires': "2030-01-01T00:00:00+00:00",
+            'created_at': "2024-01-01T00:00:00+00:00",
+            'status': "blocked", 'source': "purchased",
+        })
+        assert cookie.expires == datetime(2030, 1, 1, tzinfo=timezone.utc), "过期时间转换错误"
+        assert cookie.created_at == datetime(2024, 1, 1, tzinfo=timezone.utc), "创建时间转换错误"
+        assert cookie.status is CookieStatus.BLOCKED, "状态未转换为枚举"
+        assert cookie.source is CookieSource.PURCHASED, "来源未转换为枚举"
+
+    def test_add_cookie_replaces_same_key(self):
+        """测试添加相同(域名, 名称, 路径)的Cookie时替换原有Cookie"""
+        pool = _make_pool()
+        old = pool.cookies[0]
+        new = CookieItem(domain="example.com", name="a", value="new")
+        pool.add_cookie(new)
+        assert len(pool.cookies) == 4, "相同键的Cookie被重复添加"
+        assert pool.cookies[0] is new, "未替换原有Cookie"
+        assert old.id not in pool.cookies_by_id and pool.cookies_by_id[new.id] is new, "ID索引未更新"
+
+        pool.add_cookie(CookieItem(domain="example.com", name="a", value="other", path="/api"))
+        assert len(pool.cookies) == 5, "不同路径的Cookie应单独保存"
+
+    def test_random_rotation_uses_module_choice(self):
+        """测试随机轮换使用模块级的random.choice，只在有效Cookie中选择"""
+        pool = _make_pool(rotation_strategy="random")
+        with patch('smart_spider.models.cookie._choice', side_effect=lambda cookies: cookies[-1]) as choice:
+            cookie = pool.get_cookie_for_domain("example.org")
+        assert cookie.name == "d", "随机轮换选择错误"
+        assert [c.name for c in choice.call_args.args[0]] == ["d"], "候选Cookie包含无效Cookie"
+
+    def test_get_cookies_dict(self):
+        """测试按域名获取有效Cookie字典，不修改过期Cookie的状态"""
+        pool = _make_pool()
+        assert pool.get_cookies_dict("example.com") == {"a": "1"}, "Cookie字典包含过期Cookie"
+        assert pool.get_cookies_dict("example.org") == {"d": "4"}, "Cookie字典包含被阻塞的Cookie"
+        assert pool.get_cookies_dict("missing.com") == {}, "不存在的域名应返回空字典"
+        assert pool.cookies[1].status == CookieStatus.VALID, "查询不应修改Cookie状态"
+
+    def test_model_ids_are_uuid4(self):
+        """测试模型ID默认为UUID4字符串，可通过API的UUID4参数校验"""
+        task = Task(config=TaskConfig(name="Test Task", entry_urls=["https://example.com"]))
+        pool = _make_pool()
+        lease = CookieLease(pool_id=pool.id, cookie_name="a", domain="example.com")
+        ids = [task.id, pool.id, pool.cookies[0].id, lease.id]
+        for model_id in ids:
+            assert str(TypeAdapter(UUID4).validate_python(model_id)) == model_id, f"ID格式错误: {model_id}"
+        assert len(set(ids)) == len(ids), "ID重复"
+
+    def test_is_healthy_stops_counting_at_limit(self):
+        """测试健康检查达到最小有效数量即停止计数"""
+        pool = _make_pool(min_valid_count=1)
+        assert pool.count_valid() == 1, "达到下限后应停止计数"
+        assert pool.count_valid(limit=0) == 2, "完整统计的有效数量错误"
+        assert pool.is_healthy(), "有效Cookie足够时应健康"
+        pool.min_valid_count = 3
+        assert not pool.is_healthy(), "有效Cookie不足时不应健康"
+
+    def test_refresh_and_stats(self):
+        """测试一次遍历完成刷新和统计，结果与分别调用一致"""
+        fused = _make_pool()
+        separate = _make_pool()
+        expired_count, stats = fused.refresh_and_stats()
+        assert expired_count == separate.refresh_cookies(), "过期数量与refresh_cookies不一致"
+        assert stats == separate.get_stats(), "统计信息与get_stats不一致"
+        assert stats['expired'] == 1 and stats['valid'] == 2, "统计信息错误"
+
+    def test_default_timestamps_use_shared_clock(self):
+        """测试创建时间默认取当前UTC时间，从字典还原时保留原有时间"""
+        before = datetime.now(timezone.utc)
+        task = Task(config=TaskConfig(name="Test Task", entry_urls=["https://example.com"]))
+        pool = CookiePool(name="Test Cookie Pool")
+        for value in (task.created_at, task.updated_at, pool.created_at, pool.updated_at):
+            assert value.tzinfo is timezone.utc and value >= before, "默认时间不是当前UTC时间"
+
+        stored = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        restored = Task.from_dict({**task.to_dict(), 'created_at': stored.isoformat()})
+        assert restored.created_at == stored, "从字典还原时未保留创建时间"
+        assert restored.updated_at == task.updated_at, "从字典还原时未保留更新时间"
+
+    def test_lookup_by_id_indexes(self):
+        """测试按ID查找Cookie和代理，增删和替换列表后索引保持一致"""
+        pool = _make_pool()
+        cookie = pool.cookies[2]
+        assert pool.cookies_by_id[cookie.id] is cookie, "按ID查找Cookie错误"
+        pool.remove_cookie(cookie.name, cookie.domain)
+        assert cookie.id not in pool.cookies_by_id, "删除的Cookie仍在ID索引中"
+        assert len(pool.cookies_by_id) == 3, "ID索引数量错误"
+
+        proxies = [ProxyItem(id=f"proxy_{i}", ip="127.0.0.1", port=8000 + i) for i in range(3)]
+        proxy_pool = ProxyPool(name="Test Proxy Pool", proxies=proxies)
+        assert proxy_pool.proxies_by_id["proxy_1"] is proxies[1], "按ID查找代理错误"
+        proxy_pool.proxies.append(ProxyItem(id="proxy_new", ip="127.0.0.1", port=9000))
+        assert "proxy_new" in proxy_pool.proxies_by_id, "追加的代理未进入ID索引"
+        proxy_pool.proxies[0] = ProxyItem(id="proxy_x", ip="127.0.0.1", port=9001)
+        assert "proxy_x" in proxy_pool.proxies_by_id, "原位替换的代理未进入ID索引"
+        assert "proxy_0" not in proxy_pool.proxies_by_id, "被替换的代理仍在ID索引中"
+        proxy_pool.proxies = proxies[:1]
+        assert list(proxy_pool.proxies_by_id) == ["proxy_0"], "替换列表后ID索引未重建"
@@ -0,0 +1,39 @@
+"""
+SmartSpider 设置测试
+"""
+
+import pytest
+
+from smart_spider import settings as settings_module
+from smart_spider.settings import Settings
+
+
+class TestSettings:
+    """测试设置管理"""
+
+    def test_config_file_parsed_once(self):
+        """测试配置文件未变化时不重复解析，每个实例持有独立的副本"""
+        first = Settings()
+        hits = settings_module._load_yaml.cache_info().hits
+        second = Settings()
+        assert settings_module._load_yaml.cache_info().hits == hits + 1, "未变化的配置文件被重复解析"
+
+        first._settings['crawler']['delay'] = -1
+        assert second.get('crawler.delay') != -1, "设置实例共用了同一个字典"
+
+    def test_get_dotted_keys_from_flat_dict(self):
+        """测试点分键从预先展开的字典中读取，结果与逐级查找一致"""
+        settings = Settings()
+        assert 'crawler.concurrent_requests' in settings._flat, "点分键未预先展开"
+        assert settings.get('crawler.concurrent_requests') == settings._settings['crawler']['concurrent_requests']
+        assert settings.get('crawler') is settings._settings['crawler'], "中间层级未保留"
+        assert settings.get('crawler.missing', 'default') == 'default', "缺失的键未返回默认值"
+        assert settings['app.version'] == settings.get('app.version'), "字典式访问结果不一致"
+
+    def test_attribute_access(self):
+        """测试按属性访问设置项，结果与get一致"""
+        settings = Settings()
+        assert settings.crawler.concurrent_requests == settings.get('crawler.concurrent_requests')
+        assert settings.ns.app.version == settings.get('app.version'), "属性视图与get结果不一致"
+        with pytest.raises(AttributeError):
+            settings.missing_section
@@ -0,0 +1,107 @@
+"""
+SmartSpider 存储测试
+"""
+
+import asyncio
+import logging
+import os
+from unittest.mock import patch
+
+import pytest
+
+from smart_spider.core.storage import FileSystemStorage
+
+
+class TestStorage:
+    """测试文件系统存储"""
+
+    @pytest.mark.asyncio
+    async def test_list_items_skips_index_files(self, tmp_path):
+        """测试列出和统计文件时不包含行偏移索引文件"""
+        storage = FileSystemStorage({'path': str(tmp_path), 'format': 'jsonl'})
+        await storage.save([{'id': 1}, {'id': 2}], filename='task1_results.jsonl', index=True)
+        await storage.save([{'id': 3}], filename='other.jsonl')
+        assert os.path.exists(tmp_path / 'task1_results.idx'), "索引文件未生成"
+
+        names = sorted(item['name'] for item in await storage.list_items())
+        assert names == ['other.jsonl', 'task1_results.jsonl'], "文件列表包含索引文件"
+        assert await storage.count() == 2, "文件数量包含索引文件"
+        assert await storage.count(filename='task1_results.jsonl', index=True) == 2, "文件内项数量错误"
+
+    @pytest.mark.asyncio
+    async def test_iter_jsonl_pages_without_index(self, tmp_path):
+        """测试没有索引文件时按偏移量和数量逐行读取"""
+        storage = FileSystemStorage({'path': str(tmp_path), 'format': 'jsonl'})
+        await storage.save([{'id': i} for i in range(10)], filename='task1_results.jsonl', index=True)
+        os.remove(tmp_path / 'task1_results.idx')
+
+        page = [item['id'] async for item in storage.iter_jsonl('task1_results.jsonl', skip=3, take=4)]
+        assert page == [3, 4, 5, 6], "分页结果错误"
+        tail = [item['id'] async for item in storage.iter_jsonl('task1_results.jsonl', skip=8)]
+        assert tail == [8, 9], "读取剩余数据错误"
+        assert [item async for item in storage.iter_jsonl('missing.jsonl')] == [], "不存在的文件应返回空"
+
+    @pytest.mark.asyncio
+    async def test_iter_jsonl_seeks_with_index(self, tmp_path):
+        """测试追加写入时维护行偏移索引，分页直接定位到起始行"""
+        storage = FileSystemStorage({'path': str(tmp_path), 'format': 'jsonl'})
+        await storage.save([{'id': i, 'text': '中文' * i} for i in range(5)], filename='task1_results.jsonl', index=True)
+        await storage.save([{'id': i} for i in range(5, 8)], filename='task1_results.jsonl', index=True)
+        assert os.path.getsize(tmp_path / 'task1_results.idx') == 8 * 8, "索引条目数与行数不一致"
+
+        lookup = storage._lookup_line_offset
+        with patch.object(storage, '_lookup_line_offset', wraps=lookup) as lookup_offset:
+            page = [item['id'] async for item in storage.iter_jsonl('task1_results.jsonl', skip=4, take=3)]
+        assert page == [4, 5, 6], "按索引分页结果错误"
+        with open(tmp_path / 'task1_results.jsonl', 'rb') as f:
+            offset = len(b''.join(f.readlines()[:4]))
+        lookup_offset.assert_called_once()
+        assert await lookup(str(tmp_path / 'task1_results.jsonl'), 4) == offset, "索引中的行偏移错误"
+
+        assert await storage.delete(filename='task1_results.jsonl', index=True)
+        assert not os.path.exists(tmp_path / 'task1_results.idx'), "删除文件时未删除索引"
+
+    @pytest.mark.asyncio
+    async def test_index_only_when_requested(self, tmp_path):
+        """测试只在调用方要求时维护索引，文件名不影响是否生成索引"""
+        storage = FileSystemStorage({'path': str(tmp_path), 'format': 'jsonl'})
+        for _ in range(2):
+            await storage.save([{'id': 1}], filename='tasks.json', overwrite=True)
+        await storage.save([{'id': 1}], filename='other.jsonl')
+        await storage.save([{'id': 1}], filename='task2_results.jsonl')
+        assert sorted(os.listdir(tmp_path)) == ['other.jsonl', 'task2_results.jsonl', 'tasks.json'], \
+            "未要求索引的文件生成了索引文件"
+        assert await storage.count() == 3, "文件数量错误"
+
+        # 已有索引的文件即使不再要求索引，覆盖写入后索引仍与内容一致
+        await storage.save([{'id': 1}, {'id': 2}], filename='indexed.jsonl', index=True)
+        await storage.save([{'id': 3}], filename='indexed.jsonl', overwrite=True)
+        assert os.path.getsize(tmp_path / 'indexed.idx') == 8, "覆盖写入后索引未更新"
+
+    @pytest.mark.asyncio
+    async def test_index_unsupported_format_warns(self, tmp_path, caplog):
+        """测试非jsonl格式要求索引时记录警告，不生成索引文件"""
+        storage = FileSystemStorage({'path': str(tmp_path), 'format': 'json'})
+        with caplog.at_level(logging.WARNING, logger='smart_spider.core.storage'):
+            assert await storage.save([{'id': 1}], filename='results.json', index=True)
+        assert any('index' in record.getMessage() for record in caplog.records), "忽略index参数时未记录警告"
+        assert os.listdir(tmp_path) == ['results.json'], "非jsonl格式不应生成索引文件"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_appends_keep_index_consistent(self, tmp_path):
+        """测试并发追加同一结果文件时，索引中的行偏移与实际行起始位置一致"""
+        storage = FileSystemStorage({'path': str(tmp_path), 'format': 'jsonl'})
+        await asyncio.gather(*(
+            storage.save([{'id': i, 'text': 'x' * i}, {'id': -i}], filename='task1_results.jsonl', index=True)
+            for i in range(20)
+        ))
+        with open(tmp_path / 'task1_results.jsonl', 'rb') as f:
+            starts = []
+            position = 0
+            for line in f:
+                starts.append(position)
+                position += len(line)
+        filepath = str(tmp_path / 'task1_results.jsonl')
+        offsets = [await storage._lookup_line_offset(filepath, n) for n in range(len(starts))]
+        assert offsets == starts, "索引中的行偏移与文件内容不一致"
+        assert os.path.getsize(tmp_path / 'task1_results.idx') == 8 * 40, "索引条目数与行数不一致"
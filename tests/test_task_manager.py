@@ -0,0 +1,445 @@
+"""
+SmartSpider 任务管理器测试
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from smart_spider.core.storage import FileSystemStorage
+from smart_spider.core.task_manager import TaskManager, _CoalescedProgress, get_task_manager
+from smart_spider.models.task import Task, TaskConfig, TaskStatus
+from smart_spider.settings import settings
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 用于检查后台任务上下文的变量
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+
+@pytest.fixture(autouse=True)
+def _run_in_tmp_path(tmp_path, monkeypatch):
+    """在临时目录中运行测试，避免在仓库中创建data和exports目录"""
+    monkeypatch.chdir(tmp_path)
+
+
+def _make_manager(tmp_path) -> TaskManager:
+    """创建使用默认存储设置、导出到临时目录的任务管理器（测试在临时目录中运行，存储目录也在其中）"""
+    manager = TaskManager()
+    manager._export_dir = str(tmp_path / 'exports')
+    return manager
+
+
+async def _add_task(manager: TaskManager, results) -> Task:
+    """直接登记一个带结果的任务"""
+    task = Task(config=TaskConfig(name="Test Task", entry_urls=["https://example.com"]))
+    manager.tasks[task.id] = task
+    manager._by_status[task.status].add(task.id)
+    await manager.results_storage.save(results, filename=f'{task.id}_results.jsonl')
+    return task
+
+
+class TestTaskManager:
+    """测试任务管理器"""
+
+    @pytest.mark.asyncio
+    async def test_export_creates_dir_only_for_explicit_path(self, tmp_path):
+        """测试默认导出目录只创建一次，显式路径不在默认导出目录时创建其目录"""
+        manager = _make_manager(tmp_path)
+        task = await _add_task(manager, [{'url': 'https://example.com', 'title': 'a'}])
+
+        with patch('smart_spider.core.task_manager.os.makedirs', wraps=os.makedirs) as makedirs:
+            filepath = await manager.export_task_results(task.id)
+            assert os.path.dirname(filepath) == manager._export_dir, "默认导出路径错误"
+            assert os.path.exists(filepath), "默认导出文件不存在"
+            assert makedirs.call_count == 1, "首次导出应创建默认导出目录"
+
+            filepath = await manager.export_task_results(
+                task.id, filepath=os.path.join(manager._export_dir, 'named.json'))
+            assert os.path.exists(filepath), "导出目录下的指定文件不存在"
+            assert makedirs.call_count == 1, "默认导出目录不应重复创建"
+
+            makedirs.reset_mock()
+            other_path = str(tmp_path / 'other' / 'nested' / 'results.jsonl')
+            filepath = await manager.export_task_results(task.id, format='jsonl', filepath=other_path)
+            assert filepath == other_path, "指定导出路径错误"
+            assert os.path.exists(other_path), "指定目录下的导出文件不存在"
+            # os.makedirs递归创建上级目录时也会经过补丁，只检查首次调用
+            assert makedirs.call_args_list[0] == ((os.path.dirname(other_path),), {'exist_ok': True}), \
+                "应创建指定路径所在目录"
+
+    def test_import_does_not_create_manager(self, tmp_path):
+        """测试导入模块不创建全局任务管理器，首次获取时才创建并复用"""
+        code = (
+            "import smart_spider.core.task_manager as tm\n"
+            "print(tm._task_manager is None, tm.get_task_manager() is tm.get_task_manager())\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=tmp_path,
+            env={**os.environ, 'PYTHONPATH': str(PROJECT_ROOT)},
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        assert result.stdout.strip() == "True True", result.stderr
+        assert isinstance(get_task_manager(), TaskManager)
+
+    @pytest.mark.asyncio
+    async def test_progress_queue_coalesces_overflow(self, tmp_path):
+        """测试进度队列已满时合并进度，内存有界且不丢失计数"""
+        manager = _make_manager(tmp_path)
+        manager.PROGRESS_QUEUE_SIZE = 4
+        task = await _add_task(manager, [])
+        manager._start_progress_worker(task.id)
+        worker = next(t for t in manager._bg_tasks if t.get_name() == f'progress:{task.id}')
+        queue = manager._progress_queues[task.id]
+
+        # 回调在同一轮事件循环中连续触发，消费协程来不及处理，队列必然溢出
+        with patch('smart_spider.core.task_manager._CoalescedProgress.URL_LIMIT', 10):
+            for i in range(50):
+                manager._on_crawl_progress(task.id, {'crawled_url': f'https://example.com/{i}'})
+            manager._on_crawl_progress(task.id, {'error_url': 'https://example.com/error', 'total_count': 60})
+        assert queue.qsize() == 4, "队列超出容量"
+        assert len(queue.pending.crawled_urls) == 10, "合并进度暂存的URL超出上限"
+        assert queue.pending.crawled_dropped == 36, "超出上限的URL未计数"
+        manager._stop_progress_worker(task.id)
+        await asyncio.wait_for(worker, timeout=5)
+
+        assert task.metrics.crawled_total == 50, "已爬取URL事件被丢弃"
+        assert task.metrics.success_count == 50, "成功计数错误"
+        assert task.metrics.error_total == 1, "失败URL事件被丢弃"
+        assert task.metrics.total_count == 60, "计数器进度被丢弃"
+        assert len(task.metrics.crawled_urls) == 14, "已爬取URL集合与保留的URL不一致"
+
+    @pytest.mark.asyncio
+    async def test_coalesced_progress_matches_sequential(self, tmp_path):
+        """测试合并进度的应用结果与逐条应用一致（计数器之后到达的URL继续计数）"""
+        events = [
+            {'crawled_url': 'https://example.com/a'},
+            {'success_count': 5, 'fail_count': 1},
+            {'crawled_url': 'https://example.com/b'},
+            {'error_url': 'https://example.com/c', 'total_count': 20},
+            {'crawled_url': 'https://example.com/d'},
+        ]
+        manager = _make_manager(tmp_path)
+        coalesced = await _add_task(manager, [])
+        sequential = await _add_task(manager, [])
+
+        pending = _CoalescedProgress()
+        for progress in events:
+            pending.add(progress)
+        await manager._apply_progress(coalesced.id, [], pending)
+        await manager._apply_progress(sequential.id, events)
+
+        for key in ('success_count', 'fail_count', 'total_count', 'progress_percent',
+                    'crawled_urls', 'error_urls', 'crawled_total', 'error_total'):
+            assert getattr(coalesced.metrics, key) == getattr(sequential.metrics, key), f"{key}与逐条应用不一致"
+        assert coalesced.metrics.success_count == 7 and coalesced.metrics.fail_count == 2
+
+    @pytest.mark.asyncio
+    async def test_batched_progress_matches_sequential(self, tmp_path):
+        """测试合并处理一批进度的结果与逐条应用一致（计数器与URL混合的事件）"""
+        events = [
+            {'success_count': 5, 'crawled_url': 'https://example.com/a'},
+            {'crawled_url': 'https://example.com/b'},
+            {'fail_count': 2, 'error_url': 'https://example.com/c', 'total_count': 20},
+            {'success_count': 3},
+            {'crawled_url': 'https://example.com/d'},
+        ]
+        manager = _make_manager(tmp_path)
+        batched = await _add_task(manager, [])
+        sequential = await _add_task(manager, [])
+
+        await manager._apply_progress(batched.id, events)
+        for progress in events:
+            await manager._apply_progress(sequential.id, [progress])
+
+        for key in ('success_count', 'fail_count', 'total_count', 'progress_percent'):
+            assert getattr(batched.metrics, key) == getattr(sequential.metrics, key), f"{key}与逐条应用不一致"
+        assert batched.metrics.success_count == 4, "计数器被重复累加"
+
+    def test_prepare_config_validates(self, tmp_path):
+        """测试字典和TaskConfig配置都直接交给服务验证，无效配置抛出异常"""
+        manager = _make_manager(tmp_path)
+        validate = manager.service.validate_crawler_config
+        with patch.object(manager.service, 'validate_crawler_config', wraps=validate) as validator:
+            config = TaskConfig(name="Test Task", entry_urls=["https://example.com"])
+            assert manager._prepare_config(config) is config
+            assert manager._prepare_config(config.to_dict()) == config
+            assert validator.call_count == 2, "配置未经过验证"
+
+            config.entry_urls = "https://example.com"
+            with pytest.raises(ValueError):
+                manager._prepare_config(config)
+
+    @pytest.mark.asyncio
+    async def test_task_locks_are_per_task(self, tmp_path):
+        """测试任务锁按任务ID分片，持有一个任务的锁不阻塞其他任务的操作"""
+        manager = _make_manager(tmp_path)
+        first = await _add_task(manager, [])
+        second = await _add_task(manager, [])
+        assert manager.task_locks[first.id] is not manager.task_locks[second.id], "不同任务共用了同一把锁"
+
+        async with manager.task_locks[first.id]:
+            deleted = await asyncio.wait_for(manager.delete_task(second.id), timeout=1)
+        assert deleted, "删除其他任务失败"
+        assert second.id not in manager.tasks, "任务未从内存中删除"
+        assert second.id not in manager.task_locks, "已删除任务的锁未清理"
+
+    @pytest.mark.asyncio
+    async def test_read_only_queries_do_not_lock(self, tmp_path):
+        """测试get_task/list_tasks不等待锁，并返回任务快照"""
+        manager = _make_manager(tmp_path)
+        task = await _add_task(manager, [])
+
+        async with manager._registry_lock, manager.task_locks[task.id]:
+            assert await asyncio.wait_for(manager.get_task(task.id), timeout=1) is task
+            tasks = await asyncio.wait_for(manager.list_tasks(), timeout=1)
+        assert tasks == [task], "任务列表错误"
+
+        # 返回的列表是快照，之后的增删不影响它
+        await _add_task(manager, [])
+        assert len(tasks) == 1, "任务列表不是快照"
+
+    @pytest.mark.asyncio
+    async def test_list_tasks_by_status_index(self, tmp_path):
+        """测试按状态列出任务走状态索引，状态变更和删除同步更新索引"""
+        manager = _make_manager(tmp_path)
+        config = {'name': 'Test Task', 'entry_urls': ['https://example.com']}
+        first = await manager.create_task(config)
+        second = await manager.create_task(config)
+        assert {t.id for t in await manager.list_tasks('pending')} == {first.id, second.id}
+
+        manager._change_status(first, first.update_status, TaskStatus.COMPLETED)
+        assert await manager.list_tasks('completed') == [first], "状态索引未随状态变更更新"
+        assert await manager.list_tasks('pending') == [second], "原状态的索引未移除任务"
+        assert await manager.list_tasks('unknown') == [], "未知状态应返回空列表"
+
+        assert await manager.delete_task(second.id)
+        assert await manager.list_tasks('pending') == [], "删除任务后索引未更新"
+
+    @pytest.mark.asyncio
+    async def test_results_cache_invalidated_on_write(self, tmp_path):
+        """测试结果写入后清除缓存，再次查询读到新结果"""
+        manager = _make_manager(tmp_path)
+        task = await _add_task(manager, [{'id': 1}])
+        assert await manager.get_task_results(task.id) == [{'id': 1}]
+        assert manager._results_cache_keys[task.id], "查询结果未缓存"
+
+        await manager.results_storage.save([{'id': 2}], filename=f'{task.id}_results.jsonl')
+        assert await manager.get_task_results(task.id) == [{'id': 1}], "缓存未命中"
+        await manager._invalidate_results_cache(task.id)
+        assert task.id not in manager._results_cache_keys, "缓存键未清除"
+        assert await manager.get_task_results(task.id) == [{'id': 1}, {'id': 2}], "缓存清除后未读到新结果"
+
+    @pytest.mark.asyncio
+    async def test_run_crawler_writes_results(self, tmp_path):
+        """测试爬取完成后处理并写入带索引的结果文件，再清除结果缓存"""
+        manager = _make_manager(tmp_path)
+        task = Task(config=TaskConfig(name="Test Task", entry_urls=["https://example.com"]))
+        manager.tasks[task.id] = task
+        manager._by_status[task.status].add(task.id)
+
+        crawler = AsyncMock()
+        urls = ['https://example.com/a', 'https://example.com/b']
+        for n, url in enumerate(urls, 1):
+            crawler.start_crawling.return_value = [{'url': url, 'title': url}]
+            manager._change_status(task, task.update_status, TaskStatus.RUNNING)
+            await manager._run_crawler(task.id, crawler)
+            assert task.status == TaskStatus.COMPLETED, task.error_message
+            results = await manager.get_task_results(task.id)
+            assert [item['url'] for item in results] == urls[:n], "结果未写入或缓存未清除"
+
+        results = await manager.get_task_results(task.id, offset=1)
+        assert [item['url'] for item in results] == ['https://example.com/b'], "结果未追加或缓存未清除"
+        assert results[0]['content'] == '' and 'timestamp' in results[0], "结果未经过处理"
+        index_path = os.path.join(manager.results_storage.path, f'{task.id}_results.idx')
+        assert os.path.getsize(index_path) == 2 * 8, "结果文件未维护行偏移索引"
+
+    @pytest.mark.asyncio
+    async def test_results_written_as_jsonl_with_default_settings(self, tmp_path):
+        """测试使用默认设置（全局存储格式为json）时，任务结果仍逐行写入JSON Lines文件"""
+        manager = TaskManager()
+        assert manager.storage.format != 'jsonl', "默认设置的全局存储格式应不是jsonl"
+        task = await _add_task(manager, [])
+        await manager._save_task_results(task.id, [{'url': 'https://example.com/a'}])
+        await manager._save_task_results(task.id, [{'url': 'https://example.com/b'}])
+
+        filepath = os.path.join(manager.results_storage.path, f'{task.id}_results.jsonl')
+        with open(filepath, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line)['url'] for line in lines] == \
+            ['https://example.com/a', 'https://example.com/b'], "结果文件不是逐行追加的JSON Lines"
+        results = await manager.get_task_results(task.id, offset=1)
+        assert [item['url'] for item in results] == ['https://example.com/b'], "分页读取结果错误"
+
+    @pytest.mark.asyncio
+    async def test_storage_config_saves_results_copy(self, tmp_path):
+        """测试任务配置了storage_config时按该配置另存一份结果，任务结果文件照常追加"""
+        manager = _make_manager(tmp_path)
+        copy_dir = tmp_path / 'copy'
+        task = await _add_task(manager, [{'url': 'https://example.com/a'}])
+        task.config.storage_config = {'path': str(copy_dir), 'format': 'csv'}
+        await manager._save_task_results(task.id, [{'url': 'https://example.com/b'}])
+
+        results = await manager.get_task_results(task.id)
+        assert [item['url'] for item in results] == \
+            ['https://example.com/a', 'https://example.com/b'], "任务结果未追加"
+        copy_path = copy_dir / f'{task.id}_results.csv'
+        assert 'https://example.com/b' in copy_path.read_text(encoding='utf-8'), "未按任务存储配置另存结果"
+
+    @pytest.mark.asyncio
+    async def test_crawler_service_reused(self, tmp_path):
+        """测试创建任务复用管理器的CrawlerService，不再重新实例化"""
+        manager = _make_manager(tmp_path)
+        service = manager.service
+        with patch('smart_spider.core.task_manager.CrawlerService') as service_cls:
+            await manager.create_task({'name': 'Test Task', 'entry_urls': ['https://example.com']})
+            await manager.create_tasks([{'name': 'Other Task', 'entry_urls': ['https://example.org']}])
+        service_cls.assert_not_called()
+        assert manager.service is service, "CrawlerService被替换"
+
+    @pytest.mark.asyncio
+    async def test_no_thread_pool(self, tmp_path):
+        """测试任务管理器不持有线程池，阻塞操作通过asyncio.to_thread执行"""
+        manager = _make_manager(tmp_path)
+        assert not hasattr(manager, 'executor'), "任务管理器不应创建线程池"
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_spawn_names_task_and_copies_context(self, tmp_path):
+        """测试后台任务带名称，并在创建时的上下文中运行"""
+        manager = _make_manager(tmp_path)
+
+        async def read_request_id():
+            return _request_id.get()
+
+        token = _request_id.set('req-1')
+        try:
+            bg_task = manager._spawn(read_request_id(), name='crawler:test')
+        finally:
+            _request_id.reset(token)
+        assert bg_task.get_name() == 'crawler:test', "后台任务名称错误"
+        assert await bg_task == 'req-1', "后台任务未继承创建时的上下文"
+
+    @pytest.mark.asyncio
+    async def test_background_tasks_strongly_referenced(self, tmp_path):
+        """测试后台任务在结束前被强引用，结束后移除，关闭时等待其完成"""
+        manager = _make_manager(tmp_path)
+        release = asyncio.Event()
+        finished = []
+
+        async def background():
+            await release.wait()
+            finished.append(True)
+
+        bg_task = manager._spawn(background(), name='progress:test')
+        assert bg_task in manager._bg_tasks, "后台任务未被保存"
+
+        asyncio.get_running_loop().call_soon(release.set)
+        await manager.shutdown()
+        assert finished == [True], "关闭时未等待后台任务完成"
+        assert bg_task not in manager._bg_tasks, "已结束的后台任务未移除"
+
+    @pytest.mark.asyncio
+    async def test_single_shared_monitor(self, tmp_path, caplog):
+        """测试所有任务共用一个监控协程，每轮只保存一次"""
+        manager = _make_manager(tmp_path)
+        for _ in range(3):
+            task = await _add_task(manager, [])
+            manager._change_status(task, task.update_status, TaskStatus.RUNNING)
+
+        with patch.object(manager, '_save_tasks_to_storage', new=AsyncMock()) as save:
+            manager._ensure_monitor()
+            monitor = manager._monitor_task
+            manager._ensure_monitor()
+            assert manager._monitor_task is monitor, "重复启动了监控协程"
+            assert monitor.get_name() == 'monitor', "监控协程名称错误"
+            with caplog.at_level(logging.DEBUG, logger='smart_spider.core.task_manager'):
+                await asyncio.sleep(0)
+            assert save.await_count == 1, "监控每轮应只保存一次"
+            records = [r for r in caplog.records if r.msg.startswith("任务监控")]
+            assert len(records) == 3 and all(r.args for r in records), "监控日志应使用%风格参数延迟格式化"
+
+            monitor.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await monitor
+
+    @pytest.mark.asyncio
+    async def test_shutdown_stops_tasks_and_saves_once(self, tmp_path):
+        """测试关闭时停止所有未终止的任务，只保存一次任务状态"""
+        manager = _make_manager(tmp_path)
+        tasks = [await _add_task(manager, []) for _ in range(3)]
+        for task in tasks[:2]:
+            manager._change_status(task, task.update_status, TaskStatus.RUNNING)
+        manager._change_status(tasks[2], tasks[2].update_status, TaskStatus.COMPLETED)
+
+        with patch.object(manager, '_save_tasks_to_storage', new=AsyncMock()) as save:
+            await manager.shutdown()
+        assert save.await_count == 1, "关闭时应只保存一次"
+        assert [task.status for task in tasks] == [TaskStatus.STOPPED, TaskStatus.STOPPED, TaskStatus.COMPLETED]
+        assert {t.id for t in await manager.list_tasks('stopped')} == {tasks[0].id, tasks[1].id}
+
+    @pytest.mark.asyncio
+    async def test_export_filename_timestamp(self, tmp_path):
+        """测试默认导出文件名带有可排序的本地时间戳"""
+        manager = _make_manager(tmp_path)
+        task = await _add_task(manager, [{'id': 1}])
+        filepath = await manager.export_task_results(task.id, format='csv')
+        assert re.fullmatch(rf'{task.id}_export_\d{{8}}_\d{{6}}\.csv', os.path.basename(filepath)), \
+            "导出文件名格式错误"
+
+    @pytest.mark.asyncio
+    async def test_export_uses_storage_writers(self, tmp_path):
+        """测试导出复用文件存储的写入方法，导出文件可由同格式的存储读回"""
+        manager = _make_manager(tmp_path)
+        results = [{'id': '1', 'title': 'a'}, {'id': '2', 'title': '中文'}]
+        task = await _add_task(manager, results)
+        with patch.object(FileSystemStorage, 'save', autospec=True) as save_async, \
+                patch.object(FileSystemStorage, 'save_sync', autospec=True,
+                             side_effect=FileSystemStorage.save_sync) as save:
+            for format in FileSystemStorage.SUPPORTED_FORMATS:
+                filepath = await manager.export_task_results(task.id, format=format)
+                reader = FileSystemStorage({'path': os.path.dirname(filepath), 'format': format})
+                assert await reader.get(filename=os.path.basename(filepath)) == results, f"{format}导出内容错误"
+        assert save.call_count == len(FileSystemStorage.SUPPORTED_FORMATS), "导出未使用文件存储写入"
+        save_async.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_export_dir_created_on_first_export(self, tmp_path):
+        """测试默认导出目录按设置项在首次导出时创建，初始化时不创建"""
+        export_dir = str(tmp_path / 'exports')
+        get_setting = settings.get
+
+        def fake_get(key, default=None):
+            return export_dir if key == 'export.path' else get_setting(key, default)
+
+        with patch.object(settings, 'get', side_effect=fake_get):
+            manager = TaskManager()
+        assert manager._export_dir == export_dir, "导出目录未使用设置项"
+        assert not os.path.exists(export_dir), "初始化时不应创建导出目录"
+
+        task = await _add_task(manager, [{'id': 1}])
+        filepath = await manager.export_task_results(task.id)
+        assert os.path.dirname(filepath) == export_dir and os.path.exists(filepath), "首次导出未创建导出目录"
+
+    @pytest.mark.asyncio
+    async def test_export_runs_in_thread(self, tmp_path):
+        """测试导出文件在线程中写入，写入失败时向调用方抛出异常"""
+        manager = _make_manager(tmp_path)
+        task = await _add_task(manager, [{'id': 1}])
+        with patch('smart_spider.core.task_manager.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+            filepath = await manager.export_task_results(task.id, format='pickle')
+        assert to_thread.call_args.args[:2] == (manager._export_sync, [{'id': 1}]), "导出未在线程中执行"
+        assert os.path.getsize(filepath) > 0, "导出文件为空"
+
+        with pytest.raises(ValueError):
+            await manager.export_task_results(task.id, format='xml')
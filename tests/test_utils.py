@@ -1,23 +1,363 @@
+import logging
+import logging.handlers
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from smart_spider.logging_config import build_logging_config_from_settings
+from smart_spider.settings import Settings
+from smart_spider.utils import logger as log_utils
+from smart_spider.utils.logger import get_logger
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
 
-# 这些是占位符测试，需要用实际测试更新
 
 class TestUtils(unittest.TestCase):
     def setUp(self):
         # 设置测试环境
         pass
-    
+
     def tearDown(self):
         # 清理测试环境
         pass
-    
+
     def test_logger(self):
         # 测试日志功能
         self.assertTrue(True)  # 占位符
-    
+
+    def test_logger_errors_reach_stderr_without_tty(self):
+        # stderr不是终端且没有日志文件时，包内的ERROR记录仍然输出到stderr
+        code = (
+            "import logging, smart_spider; logging.basicConfig(); "
+            "logging.getLogger('smart_spider.core.x').error('boom')"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        self.assertIn("boom", result.stderr)
+
+    def test_logger_without_outputs_propagates(self):
+        # 关闭控制台且没有日志文件时，记录交给上级处理器
+        logger = get_logger("test_utils.no_outputs", with_console=False)
+        self.assertTrue(logger.propagate)
+        logger = get_logger("test_utils.console", with_console=True)
+        self.assertFalse(logger.propagate)
+
+    def test_import_keeps_record_metadata(self):
+        # 导入包不修改全局的日志记录字段采集，其他日志记录器的行号等字段保持可用
+        self.assertIsNotNone(logging._srcfile)
+        self.assertTrue(logging.logThreads)
+        record_logger = logging.getLogger("test_utils.metadata")
+        with self.assertLogs("test_utils.metadata") as captured:
+            record_logger.info("msg")
+        self.assertEqual(captured.records[0].filename, Path(__file__).name)
+        self.assertGreater(captured.records[0].lineno, 0)
+
+    def test_disable_record_metadata(self):
+        # 应用入口显式关闭后，记录不再携带调用位置和线程信息（在子进程中验证，不影响本进程）
+        code = (
+            "import logging\n"
+            "from smart_spider.utils.logger import disable_record_metadata\n"
+            "disable_record_metadata()\n"
+            "record = logging.getLogger('x').makeRecord('x', logging.INFO, 'f', 0, 'm', None, None)\n"
+            "print(logging._srcfile, record.thread)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        self.assertEqual(result.stdout.strip(), "None None")
+
+    def test_import_does_not_configure_logging(self):
+        # 导入包不配置日志、不启动监听线程，记录交给宿主程序的处理器
+        code = (
+            "import logging, threading\n"
+            "import smart_spider.settings\n"
+            "package_logger = logging.getLogger('smart_spider')\n"
+            "print(len(package_logger.handlers), package_logger.propagate, threading.active_count())\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        self.assertEqual(result.stdout.strip(), "0 True 1")
+
+    def test_api_configures_logging_on_startup(self):
+        # 导入API模块不修改日志配置，服务启动时才配置日志并关闭记录字段采集
+        code = (
+            "import logging\n"
+            "from fastapi.testclient import TestClient\n"
+            "from smart_spider.main_api import app\n"
+            "package_logger = logging.getLogger('smart_spider')\n"
+            "state = lambda: (logging._srcfile is not None, logging.logThreads, len(package_logger.handlers))\n"
+            "print(*state())\n"
+            "with TestClient(app):\n"
+            "    print(*state())\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT), LOG_FILE=os.path.join(tmp_dir, "api.log"))
+            result = subprocess.run(
+                [sys.executable, "-W", "ignore", "-c", code], cwd=tmp_dir, env=env,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+        self.assertEqual(result.stdout.splitlines(), ["True True 0", "False False 1"], result.stderr)
+
+    def test_logging_config_from_settings(self):
+        # 日志级别和文件来自设置项，LOG_LEVEL/LOG_FILE环境变量优先
+        with patch.dict(os.environ, {"LOG_LEVEL": "debug", "LOG_FILE": "logs/env.log"}):
+            config = build_logging_config_from_settings(Settings())
+        self.assertEqual(config['loggers']['smart_spider']['level'], "DEBUG")
+        self.assertEqual(config['handlers']['queue']['log_file'], "logs/env.log")
+
+    def test_setup_logging_writes_package_records(self):
+        # 应用入口配置日志后，包内模块的记录写入配置的日志文件
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, "spider.log")
+            code = (
+                "import logging\n"
+                "from smart_spider.logging_config import build_logging_config, setup_logging\n"
+                f"setup_logging(build_logging_config(log_level='DEBUG', log_file={log_file!r}))\n"
+                "logging.getLogger('smart_spider.core.x').debug('configured')\n"
+            )
+            subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True,
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            with open(log_file, encoding="utf-8") as f:
+                self.assertIn("smart_spider.core.x - DEBUG - configured", f.read())
+
+    def test_file_logging_single_buffer(self):
+        # 文件日志只有一层缓冲：记录出队后刷新文件处理器即可写入文件，多个日志文件共用一个刷新线程
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            code = (
+                "import os, threading\n"
+                "from smart_spider.utils import logger as log_utils\n"
+                f"paths = [os.path.join({tmp_dir!r}, name) for name in ('a.log', 'b.log')]\n"
+                "for i, path in enumerate(paths):\n"
+                "    log_utils.get_logger(f'test_utils.file{i}', log_file=path, with_console=False).info('buffered %d', i)\n"
+                "log_utils._log_queue.join()\n"
+                "for handler in log_utils._file_handlers.values():\n"
+                "    handler.flush()\n"
+                "print(sum('buffered' in open(path, encoding='utf-8').read() for path in paths))\n"
+                "names = [t.name for t in threading.enumerate() if t is not threading.main_thread()]\n"
+                "print(len(names), names.count('smart_spider-log-flush'))\n"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+        lines = result.stdout.splitlines()
+        self.assertEqual(lines[0], "2", result.stderr)
+        # 除队列监听线程外只有一个刷新线程，没有按处理器创建的定时器线程
+        self.assertEqual(lines[1], "2 1")
+
+    def test_setup_logging_after_get_logger_same_file(self):
+        # 先用get_logger打开日志文件再调用setup_logging：dictConfig关闭的文件处理器在下次写入时重新打开
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, "shared.log")
+            code = (
+                "import logging\n"
+                "from smart_spider.logging_config import build_logging_config, setup_logging\n"
+                "from smart_spider.utils.logger import get_logger\n"
+                f"logger = get_logger('test_utils.x', log_file={log_file!r}, with_console=False)\n"
+                f"setup_logging(build_logging_config(log_file={log_file!r}, with_console=False))\n"
+                "logger.info('from x')\n"
+                "logging.getLogger('smart_spider.core.x').info('from package')\n"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            with open(log_file, encoding="utf-8") as f:
+                content = f.read()
+        self.assertNotIn("Logging error", result.stderr)
+        self.assertIn("test_utils.x - INFO - from x", content)
+        self.assertIn("smart_spider.core.x - INFO - from package", content)
+
+    def test_get_logger_after_shutdown(self):
+        # 停止监听器后再次以相同参数获取日志记录器时重新配置，记录照常写入文件
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, "restart.log")
+            code = (
+                "from smart_spider.utils import logger as log_utils\n"
+                f"log_utils.get_logger('test_utils.restart', log_file={log_file!r}, with_console=False)\n"
+                "log_utils._shutdown_listener()\n"
+                f"logger = log_utils.get_logger('test_utils.restart', log_file={log_file!r}, with_console=False)\n"
+                "logger.info('after restart')\n"
+                "log_utils._log_queue.join()\n"
+                "print(log_utils._listener._thread.is_alive(), log_utils._flush_thread.is_alive())\n"
+                "log_utils._shutdown_listener()\n"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30
+            )
+            with open(log_file, encoding="utf-8") as f:
+                content = f.read()
+        self.assertEqual(result.stdout.strip(), "True True", result.stderr)
+        self.assertIn("test_utils.restart - INFO - after restart", content)
+
+    def test_logger_uses_queue_handler(self):
+        # 日志记录器只挂QueueHandler，实际输出由后台监听线程完成
+        logger = get_logger("test_utils.queue", with_console=True)
+        self.assertEqual([type(h) for h in logger.handlers], [logging.handlers.QueueHandler])
+        self.assertIs(logger.handlers[0].queue, log_utils._log_queue)
+        self.assertIsNotNone(log_utils._listener)
+        self.assertTrue(log_utils._listener._thread.is_alive())
+
+    def test_buffered_file_handler(self):
+        # 文件处理器使用大缓冲区，普通记录不逐条写盘，ERROR及以上立即写出
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, "buffered.log")
+            handler = log_utils.BufferedFileHandler(log_file)
+            try:
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                make_record = logging.getLogger("test_utils.buffered").makeRecord
+                handler.handle(make_record("x", logging.INFO, __file__, 0, "info message", None, None))
+                self.assertEqual(os.path.getsize(log_file), 0)
+                handler.handle(make_record("x", logging.ERROR, __file__, 0, "error message", None, None))
+                with open(log_file, encoding="utf-8") as f:
+                    self.assertEqual(f.read(), "info message\nerror message\n")
+            finally:
+                handler.close()
+            self.assertIsNone(handler.stream)
+
+    def test_get_logger_reuses_configuration(self):
+        # 参数相同的重复调用直接返回已配置的日志记录器，参数变化时重新配置
+        logger = get_logger("test_utils.cached", with_console=True)
+        handler = logger.handlers[0]
+        self.assertIs(get_logger("test_utils.cached", with_console=True).handlers[0], handler)
+        self.assertFalse(logger.propagate)
+        logger = get_logger("test_utils.cached", log_level="DEBUG", with_console=True)
+        self.assertIsNot(logger.handlers[0], handler)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertEqual(logger.level, logging.DEBUG)
+
+    def test_log_directory_created(self):
+        # 日志文件所在的多级目录不存在时自动创建，已存在时不报错
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, "nested", "dir", "app.log")
+            for _ in range(2):
+                handler = log_utils._make_file_handler(log_file)
+                handler.close()
+            self.assertTrue(os.path.isfile(log_file))
+
+    def test_shared_formatter(self):
+        # 控制台和文件处理器共用模块级的格式化器
+        get_logger("test_utils.formatter", with_console=True)
+        console_handler = log_utils._listener.handlers[0]
+        self.assertIs(console_handler.formatter, log_utils._FORMATTER)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            handler = log_utils._make_file_handler(os.path.join(tmp_dir, "app.log"))
+            handler.close()
+        self.assertIs(handler.formatter, log_utils._FORMATTER)
+
+    def test_package_loggers_have_no_handlers(self):
+        # 包内模块的日志记录器不挂处理器，记录传播到smart_spider日志记录器统一输出
+        logger = get_logger("smart_spider.core.example")
+        self.assertIs(logger, logging.getLogger("smart_spider.core.example"))
+        self.assertEqual(logger.handlers, [])
+        self.assertTrue(logger.propagate)
+        self.assertNotIn("smart_spider.core.example", log_utils._configured)
+
+        # 显式传入的级别和控制台参数仍然生效
+        logger = get_logger("smart_spider.core.level", log_level="DEBUG")
+        self.assertEqual(logger.level, logging.DEBUG)
+        self.assertEqual(logger.handlers, [])
+        logger = get_logger("smart_spider.core.console", with_console=True)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertFalse(logger.propagate)
+
+    def test_cached_time_formatter(self):
+        # 按秒缓存时间字符串后，格式化结果与标准格式化器一致，同一秒内只更新毫秒部分
+        fmt = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        cached = log_utils._CachedTimeFormatter(fmt)
+        plain = logging.Formatter(fmt)
+        make_record = logging.getLogger("test_utils.time").makeRecord
+        for created in (1700000000.123, 1700000000.789, 1700000001.5):
+            record = make_record("x", logging.INFO, __file__, 0, "message", None, None)
+            record.created = created
+            record.msecs = int((created - int(created)) * 1000)
+            self.assertEqual(cached.format(record), plain.format(record))
+            self.assertEqual(cached.formatTime(record, "%Y"), plain.formatTime(record, "%Y"))
+        self.assertEqual(cached._cached[0], 1700000001)
+
+    def test_same_log_file_shares_handler(self):
+        # 同一日志文件的不同写法和重复配置复用同一个文件处理器，不重新打开文件（在子进程中验证）
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            code = (
+                "import os\n"
+                "from smart_spider.utils import logger as log_utils\n"
+                f"os.chdir({tmp_dir!r})\n"
+                "first = log_utils._get_file_handler('shared.log')\n"
+                "stream = first.stream\n"
+                "log_utils.get_logger('test_utils.a', log_file='shared.log', with_console=False)\n"
+                "log_utils.get_logger('test_utils.a', log_file='shared.log', log_level='DEBUG', with_console=False)\n"
+                "log_utils.get_logger('test_utils.b', log_file=os.path.abspath('shared.log'), with_console=False)\n"
+                "targets = {h.target for h in log_utils._logger_file_handlers.values()}\n"
+                "print(len(log_utils._file_handlers), targets == {first}, first.stream is stream)\n"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+        self.assertEqual(result.stdout.strip(), "1 True True", result.stderr)
+
+    def test_log_level_resolution(self):
+        # 级别名称不区分大小写，也接受级别数值，未知名称回退到INFO
+        self.assertEqual(get_logger("test_utils.level_name", log_level="debug").level, logging.DEBUG)
+        self.assertEqual(get_logger("test_utils.level_number", log_level=logging.WARNING).level, logging.WARNING)
+        self.assertEqual(get_logger("test_utils.level_unknown", log_level="verbose").level, logging.INFO)
+
+    def test_demo_replaces_previous_log(self):
+        # 示例每次运行前删除上次的test.log，文件内容不会随运行次数增长
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, "test.log")
+            with open(log_file, "w", encoding="utf-8") as f:
+                f.write("previous run\n")
+            env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+            subprocess.run(
+                [sys.executable, "-c", "from smart_spider.utils.logger import _demo; _demo()"],
+                cwd=tmp_dir, env=env, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+            with open(log_file, encoding="utf-8") as f:
+                content = f.read()
+        self.assertNotIn("previous run", content)
+        self.assertEqual(content.count("test_logger - "), 5)
+
+    def test_logrotate_reopens_file(self):
+        # 设置SMARTSPIDER_LOGROTATE时使用检查轮转的处理器，文件被移走后重新打开；否则直接写入
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, "app.log")
+            with patch.dict(os.environ):
+                os.environ.pop("SMARTSPIDER_LOGROTATE", None)
+                handler = log_utils._pick_file_handler(log_file)
+                handler.close()
+            self.assertIs(type(handler), log_utils.BufferedFileHandler)
+
+            with patch.dict(os.environ, {"SMARTSPIDER_LOGROTATE": "1"}):
+                handler = log_utils._pick_file_handler(log_file)
+            self.assertIsInstance(handler, log_utils.WatchedBufferedFileHandler)
+            try:
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                make_record = logging.getLogger("test_utils.rotate").makeRecord
+                handler.handle(make_record("x", logging.ERROR, __file__, 0, "before", None, None))
+                os.rename(log_file, log_file + ".1")
+                handler.handle(make_record("x", logging.ERROR, __file__, 0, "after", None, None))
+            finally:
+                handler.close()
+            with open(log_file + ".1", encoding="utf-8") as f:
+                self.assertEqual(f.read(), "before\n")
+            with open(log_file, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "after\n")
+
     def test_common_functions(self):
         # 测试通用工具函数
         self.assertTrue(True)  # 占位符
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()